@@ -1,119 +1,306 @@
-from flask import Flask, request, jsonify
+from flask import Blueprint, Flask, Request, current_app, g, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
-import os, logging, uuid, re
+import os, logging, uuid, json, queue, threading, time, base64, hashlib, zipfile, zlib
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from pathlib import Path
-from datetime import datetime
-from transformers import T5Tokenizer, T5ForConditionalGeneration
-from PyPDF2 import PdfReader
+from types import SimpleNamespace
+from datetime import datetime, timedelta
 from werkzeug.utils import secure_filename
-import docx
-from chromadb import PersistentClient
 from pymongo import MongoClient
-import torch
-from pdf2image import convert_from_path
-import pytesseract
-import fitz
-from torch.cuda import is_available as cuda_is_available
 from werkzeug.security import generate_password_hash, check_password_hash
+from config import Config
+from utils.rag_pipeline import get_chunk_collection, get_embedding_function, index_document, index_documents, index_page, retrieve_chunks, search_chunks, group_by_document, delete_document_chunks
+from utils.job_queue import JobQueue, QueueFullError
+from utils.content_cache import ContentCache
+from utils.uploads import UploadTooLarge, spool_upload, run_upload_sweeper
+from utils.summarization import map_reduce_summarize
+from utils.prompt_budget import PromptBudget
+from utils.progress import ProgressBroker, JobProgress, TERMINAL_STATUSES, progress_advanced
+from utils.lazy import LazyResource, LazyProxy
+from utils.answer_cache import AnswerCache
+from utils.semantic_cache import SemanticAnswerCache
+from utils.instrumentation import metrics, stage_timer
+from utils import point_similarity
+from utils.text_normalization import TextCleaner, clean_upload_text, polish_summary, split_points
+from utils.admission import AdmissionController, AdmissionRejected, PrioritizedGenerator, BACKGROUND
+
+# torch, transformers, chromadb, fitz, pytesseract and docx are imported by the
+# loaders that need them, so startup and cheap endpoints never wait on them.
 
-# Initialize Flask and configs
-app = Flask(__name__)
-CORS(app)
 BASE_DIR = Path(__file__).parent
 UPLOAD_FOLDER = BASE_DIR / 'uploads'
 UPLOAD_FOLDER.mkdir(exist_ok=True)
-app.config.update(
-    UPLOAD_FOLDER=str(UPLOAD_FOLDER),
-    MAX_CONTENT_LENGTH=10 * 1024 * 1024  # 10MB max
-)
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize databases
+api = Blueprint('api', __name__)
+
+@api.before_request
+def start_request_timer():
+    if metrics.enabled:
+        g.request_started = time.perf_counter()
+
+@api.before_request
+def reject_oversized_request():
+    # Handlers catch the RequestEntityTooLarge a body read would raise, so check the declared size first
+    limit = request.max_content_length
+    if limit is not None and request.content_length is not None and request.content_length > limit:
+        return jsonify({"error": "Request too large"}), 413
+
+@api.after_request
+def record_request_metrics(response):
+    """Per-endpoint latency (until the response object exists; streamed bodies excluded)"""
+    if metrics.enabled and 'request_started' in g:
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        metrics.observe("http_request_duration_seconds", time.perf_counter() - g.request_started,
+                        endpoint=endpoint, method=request.method)
+        metrics.inc("http_requests_total", endpoint=endpoint, method=request.method,
+                    status=str(response.status_code))
+    return response
+
+# Initialize databases (MongoClient only connects on first use)
 try:
-    chroma_client = PersistentClient(path=str(BASE_DIR / "chroma_db"))
-    collection = chroma_client.get_or_create_collection("research_papers")
-    mongo_client = MongoClient('mongodb://localhost:27017/')
+    mongo_client = MongoClient('mongodb://localhost:27017/', serverSelectionTimeoutMS=5000)
     db = mongo_client['researchai']
     history_collection = db['History']
     users_collection = db['users']
+    content_cache = ContentCache(db['ContentCache'])
+    answer_cache = AnswerCache(
+        max_entries=Config.ANSWER_CACHE_SIZE,
+        ttl_seconds=Config.ANSWER_CACHE_TTL,
+        mongo_collection=db['AnswerCache'] if Config.ANSWER_CACHE_MONGO else None
+    )
 except Exception as e:
     logger.error(f"Database initialization failed: {str(e)}")
     raise
 
-# Initialize AI model
-try:
-    device = torch.device("cuda" if cuda_is_available() else "cpu")
-    tokenizer = T5Tokenizer.from_pretrained("google/flan-t5-base")
-    model = T5ForConditionalGeneration.from_pretrained("google/flan-t5-base").to(device)
-    model.eval()
-    torch.set_grad_enabled(False)
-except Exception as e:
-    logger.error(f"Model loading failed: {str(e)}")
-    raise
+def load_chroma():
+    from chromadb import PersistentClient
+    chroma_client = PersistentClient(path=str(BASE_DIR / "chroma_db"))
+    return SimpleNamespace(
+        client=chroma_client,
+        # Chroma's default embedding is a separately downloaded ONNX copy of the same model
+        collection=chroma_client.get_or_create_collection("research_papers", embedding_function=get_embedding_function())
+    )
+
+def load_embeddings():
+    return get_chunk_collection(chroma.get().client)
+
+def load_model():
+    if Config.MODEL_SERVER_ADDRESSES:
+        # Production mode (serve.py): generation runs in shared model-server processes
+        from transformers import T5Tokenizer
+        from utils.model_server import RemoteGenerator
+        bundle = SimpleNamespace(
+            device=None,
+            model=None,
+            tokenizer=T5Tokenizer.from_pretrained(Config.LLM_MODEL),
+            generator=RemoteGenerator(
+                Config.MODEL_SERVER_ADDRESSES,
+                authkey=Config.MODEL_SERVER_AUTHKEY.encode(),
+                max_batch_size=Config.BATCH_MAX_SIZE
+            )
+        )
+    else:
+        from utils.model_server import load_local_model
+        bundle = load_local_model(admission)
+    bundle.prompt_budget = PromptBudget(bundle.tokenizer)
+    return bundle
+
+# Heavy subsystems load on first use (or during warmup) and are shared by all threads
+chroma = LazyResource("chroma", load_chroma)
+embeddings = LazyResource("embeddings", load_embeddings)
+model_bundle = LazyResource("model", load_model)
+
+collection = LazyProxy(chroma, "collection")
+chunk_collection = LazyProxy(embeddings)
+tokenizer = LazyProxy(model_bundle, "tokenizer")
+generator = LazyProxy(model_bundle, "generator")
+prompt_budget = LazyProxy(model_bundle, "prompt_budget")
+
+# Bounds prompts queued for (or streaming from) the in-process model, /ask ahead of summary jobs.
+# serve.py model servers each apply their own, so there is none here in that mode.
+admission = None if Config.MODEL_SERVER_ADDRESSES else AdmissionController(
+    max_concurrent=Config.INFERENCE_MAX_CONCURRENT,
+    max_queue=Config.INFERENCE_MAX_QUEUE,
+    queue_timeout=Config.INFERENCE_QUEUE_TIMEOUT,
+    background_limit=Config.BATCH_MAX_SIZE  # One batch of summary prompts; the rest is kept for /ask
+)
+background_generator = PrioritizedGenerator(generator, BACKGROUND)
+
+def admission_stats():
+    """Stats of the controller bounding inference: this process's, or the model servers' summed.
+
+    None while the model servers' client is not loaded; never triggers loading.
+    """
+    if admission is not None:
+        return admission.stats()
+    if not model_bundle.ready:
+        return None
+    return generator.admission_stats()
+
+metrics.gauge("inference_in_flight", lambda: (admission_stats() or {}).get("in_flight", 0))
+metrics.gauge("inference_queue_depth", lambda: (admission_stats() or {}).get("queued_interactive", 0),
+              priority="interactive")
+metrics.gauge("inference_queue_depth", lambda: (admission_stats() or {}).get("queued_background", 0),
+              priority="background")
+
+# Paraphrased questions reuse answers; shares the chunk embedding model
+semantic_cache = SemanticAnswerCache(
+    embed=lambda texts: get_embedding_function()(texts),
+    threshold=Config.SEMANTIC_CACHE_THRESHOLD,
+    max_questions_per_doc=Config.SEMANTIC_CACHE_MAX_QUESTIONS
+)
+
+# Initialize summary worker pool
+summary_jobs = JobQueue(
+    max_workers=Config.SUMMARY_WORKERS,
+    max_pending=Config.SUMMARY_QUEUE_SIZE
+)
+
+# Push channel for summary progress; Mongo only sees durable state changes
+progress_broker = ProgressBroker()
+
+# Page-by-page indexing of PDF uploads (INCREMENTAL_INGESTION)
+ingest_pool = ThreadPoolExecutor(max_workers=Config.INGEST_WORKERS, thread_name_prefix="ingest")
+
+# Library searches run here so a request can give up after SEARCH_TIMEOUT
+search_pool = ThreadPoolExecutor(max_workers=Config.SEARCH_WORKERS, thread_name_prefix="search")
 
 # Core helper functions
 def validate_file(file):
+    # Size is enforced while the upload is spooled to disk, see spool_upload
     if not file or file.filename == '': return False, "No file selected"
-    file.seek(0, 2)
-    size = file.tell()
-    file.seek(0)
-    if size > app.config['MAX_CONTENT_LENGTH']: return False, "File too large"
     if file.filename.lower().split('.')[-1] not in ['pdf', 'docx', 'txt']:
         return False, "Unsupported file type"
     return True, ""
 
 def extract_text(filepath, ext):
+    """Extract and clean a document's text, stopping once the cleaner has enough"""
     try:
+        cleaner = TextCleaner()
         if ext == 'pdf':
-            doc = fitz.open(filepath)
-            text = "\n".join(page.get_text() for page in doc[:50])
-            if len(text.strip()) < 100:
-                images = convert_from_path(filepath, dpi=300)
-                text = "\n".join(pytesseract.image_to_string(img) for img in images[:50])
+            from utils.pdf_extraction import iter_pdf_pages
+            pages = iter_pdf_pages(filepath)
+            try:
+                for page in pages:
+                    if cleaner.feed(page + "\n"):
+                        break
+            finally:
+                pages.close()  # Cancels OCR of pages that are no longer needed
         elif ext == 'docx':
+            import docx
             doc = docx.Document(filepath)
-            text = "\n".join(p.text for p in doc.paragraphs if p.text.strip())
+            for p in doc.paragraphs:
+                if cleaner.feed(p.text + "\n"):
+                    break
         else:
             with open(filepath, 'r', encoding='utf-8') as f:
-                text = f.read(500000)
-        return clean_text(text) if text else None
+                remaining = 500000
+                while remaining > 0:
+                    block = f.read(min(65536, remaining))
+                    if not block or cleaner.feed(block):
+                        break
+                    remaining -= len(block)
+        return cleaner.finish() or None
     except Exception as e:
         logger.error(f"Text extraction error: {str(e)}")
         return None
 
-def clean_text(text):
-    text = re.sub(r'http\S+|www\S+|https\S+|\s+', ' ', text)
-    return text.strip()[:100000]
+def resolve_document(doc_id):
+    """Map a history doc_id to the Chroma id holding its (possibly shared) text.
+
+    Also returns {"pages_indexed", "pages_total"} while incremental ingestion
+    is still adding pages, and None once the document is fully indexed.
+    """
+    record = history_collection.find_one(
+        {"doc_id": doc_id},
+        {"content_id": 1, "indexing": 1, "pages_indexed": 1, "pages_total": 1, "_id": 0}
+    ) or {}
+    indexing = None
+    if record.get("indexing") == "running":
+        indexing = {"pages_indexed": record.get("pages_indexed", 0), "pages_total": record.get("pages_total")}
+    return record.get("content_id", doc_id), indexing
+
+def run_incremental_ingest(upload, doc_id, user_id):
+    """Extract a PDF on an ingest worker, indexing each page's chunks as soon as it is read.
+
+    The history record counts pages_indexed so /ask can answer from them; the
+    full text reaches the Chroma collection and the content cache (and so
+    becomes summarizable) once the last page is in.
+    """
+    from utils.pdf_extraction import iter_pdf_pages, pdf_page_count
+    metadata = {
+        "source": upload.filename,
+        "timestamp": datetime.utcnow().isoformat(),
+        "user_id": user_id
+    }
+    with upload:
+        try:
+            history_collection.update_one({"doc_id": doc_id}, {"$set": {"pages_total": pdf_page_count(upload.path)}})
+            cleaner = TextCleaner()
+            chunk_count = 0
+            pages = iter_pdf_pages(upload.path)
+            try:
+                for page_number, page in enumerate(pages, 1):
+                    page_text = clean_upload_text(page)
+                    with stage_timer("index_page"):
+                        chunk_count += index_page(chunk_collection, doc_id, page_text, metadata, page_number, chunk_count)
+                    history_collection.update_one({"doc_id": doc_id}, {"$set": {"pages_indexed": page_number}})
+                    if cleaner.feed(page_text + " "):
+                        break
+            finally:
+                pages.close()
+            text = cleaner.finish()
+            if not text:
+                raise ValueError("no text found")
+
+            with stage_timer("chroma_add"):
+                collection.add(ids=[doc_id], documents=[text], metadatas=[metadata])
+            content_cache.register(upload.file_hash, doc_id, upload.filename)
+            previous = history_collection.find_one_and_update(
+                {"doc_id": doc_id},
+                {"$set": {
+                    "indexing": "completed",
+                    "text_preview": text[:200] + "..." if len(text) > 200 else text
+                }},
+                projection={"status": 1, "_id": 0}
+            ) or {}
+        except Exception as e:
+            logger.error(f"Incremental ingest of {doc_id} failed: {str(e)}")
+            delete_document_chunks(chunk_collection, doc_id=doc_id)
+            history_collection.update_one(
+                {"doc_id": doc_id},
+                {"$set": {"indexing": "failed", "status": "failed", "error": "Text extraction failed"}}
+            )
+            progress_broker.publish(doc_id, {"doc_id": doc_id, "status": "failed", "error": "Text extraction failed"})
+            return
+
+    # A summary requested while indexing was recorded, not queued; queue it now
+    if previous.get("status") == "waiting_for_index":
+        try:
+            queue_summary_job(doc_id)
+        except QueueFullError as e:
+            history_collection.update_one({"doc_id": doc_id}, {"$set": {"status": "failed", "error": str(e)}})
+            progress_broker.publish(doc_id, {"doc_id": doc_id, "status": "failed", "error": str(e)})
 
 def generate_response(prompt, max_length=512, temperature=0.7):
     """Generate text response using FLAN-T5"""
-    inputs = tokenizer(
+    return generator.generate(
         prompt,
-        return_tensors="pt",
-        max_length=512,  # Reduced from 1024
-        truncation=True,
-        padding=True
-    ).to(device)
-    
-    with torch.no_grad():
-        output_ids = model.generate(
-            input_ids=inputs.input_ids,
-            attention_mask=inputs.attention_mask,
-            max_length=max_length,
-            min_length=max_length//2,
-            num_beams=4,
-            no_repeat_ngram_size=3,
-            early_stopping=True,
-            temperature=temperature
-        )
-    
-    return tokenizer.decode(output_ids[0], skip_special_tokens=True)
+        max_input_length=512,  # Reduced from 1024
+        max_length=max_length,
+        min_length=max_length//2,
+        num_beams=4,
+        no_repeat_ngram_size=3,
+        early_stopping=True,
+        temperature=temperature
+    )
 
 # API Endpoints
-@app.route('/signup', methods=['POST'])
+@api.route('/signup', methods=['POST'])
 def signup():
     try:
         data = request.get_json()
@@ -142,7 +329,7 @@ def signup():
         logger.error(f"Signup error: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
 
-@app.route('/login', methods=['POST'])
+@api.route('/login', methods=['POST'])
 def login():
     try:
         data = request.get_json()
@@ -165,14 +352,14 @@ def login():
         logger.error(f"Login error: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
     
-@app.route('/summarize', methods=['POST'])
+@api.route('/summarize', methods=['POST'])
 def summarize():
     try:
         if 'file' not in request.files:
             return jsonify({"error": "No file uploaded"}), 400
             
         user_id = request.form.get('user_id')
-        print(f"Received user_id in /summarize: {user_id}")  # Debug log
+        logger.debug(f"Received user_id in /summarize: {user_id}")
         
         if not user_id:
             return jsonify({"error": "No user_id provided"}), 401
@@ -183,53 +370,283 @@ def summarize():
             return jsonify({"error": message}), 400
         
         filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        doc_id = str(uuid.uuid4())
+        try:
+            upload = spool_upload(file.stream, filename, current_app.config['UPLOAD_FOLDER'],
+                                  current_app.config['MAX_FILE_SIZE'])
+        except UploadTooLarge:
+            return jsonify({"error": "File too large"}), 413
+        with upload:
+            file_hash = upload.file_hash
+            cached = content_cache.lookup(file_hash)
         
-        ext = filename.lower().split('.')[-1]
-        text = extract_text(filepath, ext)
-        if not text:
-            return jsonify({"error": "Text extraction failed"}), 500
+            if cached:
+                # Same file uploaded before: reuse its extracted text and Chroma entries
+                content_id = cached['content_id']
+                stored = collection.get(ids=[content_id], include=["documents"])
+                if not stored['documents']:
+                    cached = None
         
-        doc_id = str(uuid.uuid4())
+            if not cached and upload.ext == 'pdf' and Config.INCREMENTAL_INGESTION:
+                # Pages are indexed in the background; /ask can use them as they arrive
+                history_collection.insert_one({
+                    "doc_id": doc_id,
+                    "content_id": doc_id,
+                    "file_hash": file_hash,
+                    "filename": filename,
+                    "timestamp": datetime.utcnow(),
+                    "status": "uploaded",
+                    "user_id": user_id,
+                    "indexing": "running",
+                    "pages_indexed": 0
+                })
+                ingest_pool.submit(run_incremental_ingest, upload.hand_off(), doc_id, user_id)
+                return jsonify({
+                    "message": "File uploaded, pages are being indexed",
+                    "doc_id": doc_id,
+                    "source": filename,
+                    "cached": False,
+                    "indexing": True
+                }), 202
         
-        # Save to ChromaDB
-        collection.add(
-            ids=[doc_id],
-            documents=[text],
-            metadatas=[{
-                "source": filename,
-                "timestamp": datetime.utcnow().isoformat(),
-                "user_id": user_id
-            }]
-        )
+            if cached:
+                text = stored['documents'][0]
+            else:
+                with stage_timer("extract_text"):
+                    text = extract_text(upload.path, upload.ext)
+                if not text:
+                    return jsonify({"error": "Text extraction failed"}), 500
+            
+                content_id = doc_id
+                metadata = {
+                    "source": filename,
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "user_id": user_id
+                }
+            
+                # Save to ChromaDB
+                with stage_timer("chroma_add"):
+                    collection.add(
+                        ids=[content_id],
+                        documents=[text],
+                        metadatas=[metadata]
+                    )
+            
+                # Index overlapping chunks for retrieval in /ask
+                with stage_timer("index_chunks"):
+                    index_document(chunk_collection, content_id, text, metadata)
+                content_cache.register(file_hash, content_id, filename)
         
-        # Save to MongoDB
-        history_doc = {
-            "doc_id": doc_id,
-            "filename": filename,
-            "timestamp": datetime.utcnow(),
-            "status": "uploaded",
-            "user_id": user_id,  # Make sure this is saved
-            "text_preview": text[:200] + "..." if len(text) > 200 else text
-        }
+            # Save to MongoDB
+            history_doc = {
+                "doc_id": doc_id,
+                "content_id": content_id,
+                "file_hash": file_hash,
+                "filename": filename,
+                "timestamp": datetime.utcnow(),
+                "status": "uploaded",
+                "user_id": user_id,  # Make sure this is saved
+                "text_preview": text[:200] + "..." if len(text) > 200 else text
+            }
         
-        print(f"Saving to MongoDB with user_id: {user_id}")  # Debug log
-        history_collection.insert_one(history_doc)
+            cached_summary = content_cache.get_summary(file_hash) if cached else None
+            if cached_summary:
+                history_doc.update({
+                    "status": "completed",
+                    "progress": 100,
+                    "summary": cached_summary['summary'],
+                    "advantages": cached_summary['advantages'],
+                    "disadvantages": cached_summary['disadvantages'],
+                    "last_updated": datetime.utcnow()
+                })
         
-        return jsonify({
-            "message": "File uploaded successfully",
-            "doc_id": doc_id,
-            "source": filename
-        })
+            logger.debug(f"Saving to MongoDB with user_id: {user_id}")
+            history_collection.insert_one(history_doc)
+        
+            return jsonify({
+                "message": "File uploaded successfully",
+                "doc_id": doc_id,
+                "source": filename,
+                "cached": bool(cached)
+            })
         
     except Exception as e:
-        print(f"Error in /summarize: {str(e)}")  # Debug log
         logger.error(f"Summarize error: {str(e)}")
         return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
-# Update the generate_summary function
-@app.route('/generate_summary', methods=['POST'])
+def collect_batch_uploads(upload_dir, uploads):
+    """Spool every file of a batch request (zip archives expanded) to the upload folder.
+
+    Appends one dict per file with its filename and SpooledUpload, or an
+    error, to `uploads` as it goes, so the caller can discard whatever was
+    spooled if a later file fails.
+    """
+    max_size = current_app.config['MAX_FILE_SIZE']
+
+    def add(filename, open_stream):
+        filename = secure_filename(filename)
+        ext = filename.lower().rsplit('.', 1)[-1] if '.' in filename else ''
+        if len(uploads) >= Config.BATCH_MAX_FILES:
+            uploads.append({"filename": filename, "error": "Too many files in batch"})
+        elif ext not in ['pdf', 'docx', 'txt']:
+            uploads.append({"filename": filename, "error": "Unsupported file type"})
+        else:
+            try:
+                with open_stream() as stream:
+                    spooled = spool_upload(stream, filename, upload_dir, max_size)
+                uploads.append({"filename": filename, "doc_id": str(uuid.uuid4()), "spooled": spooled})
+            except UploadTooLarge:
+                uploads.append({"filename": filename, "error": "File too large"})
+            except (zipfile.BadZipFile, RuntimeError, NotImplementedError, zlib.error):
+                # Corrupt, encrypted or unsupported-compression archive member
+                uploads.append({"filename": filename, "error": "Could not read file from archive"})
+
+    for file in request.files.getlist('files'):
+        if file.filename.lower().endswith('.zip'):
+            try:
+                archive = zipfile.ZipFile(file.stream)
+            except zipfile.BadZipFile:
+                uploads.append({"filename": secure_filename(file.filename), "error": "Invalid zip archive"})
+                continue
+            with archive:
+                for member in archive.infolist():
+                    if not member.is_dir():
+                        add(os.path.basename(member.filename), lambda member=member: archive.open(member))
+        else:
+            add(file.filename, lambda file=file: file.stream)
+
+@api.route('/summarize/batch', methods=['POST'])
+def summarize_batch():
+    """Ingest many documents at once (multipart 'files', zip archives allowed).
+
+    Extraction runs in parallel; Chroma and Mongo writes are batched. Returns
+    a status entry per file.
+    """
+    uploads = []
+    try:
+        user_id = request.form.get('user_id')
+        if not user_id:
+            return jsonify({"error": "No user_id provided"}), 401
+        if not request.files.getlist('files'):
+            return jsonify({"error": "No files uploaded"}), 400
+
+        collect_batch_uploads(current_app.config['UPLOAD_FOLDER'], uploads)
+        accepted = [upload for upload in uploads if "error" not in upload]
+
+        # Reuse earlier uploads (and duplicates inside this batch) by content hash
+        first_by_hash, to_extract = {}, []
+        for upload in accepted:
+            upload['file_hash'] = upload['spooled'].file_hash
+            cached = content_cache.lookup(upload['file_hash'])
+            if cached:
+                upload['content_id'] = cached['content_id']
+                upload['cached'] = True
+            elif upload['file_hash'] in first_by_hash:
+                upload['duplicate_of'] = first_by_hash[upload['file_hash']]
+            else:
+                first_by_hash[upload['file_hash']] = upload
+                upload['content_id'] = upload['doc_id']
+                to_extract.append(upload)
+
+        with stage_timer("extract_text_batch"), ThreadPoolExecutor(max_workers=Config.INGEST_WORKERS) as pool:
+            texts = pool.map(lambda upload: extract_text(upload['spooled'].path, upload['spooled'].ext), to_extract)
+            for upload, text in zip(to_extract, texts):
+                if text:
+                    upload['text'] = text
+                else:
+                    upload['error'] = "Text extraction failed"
+
+        new_documents = [upload for upload in to_extract if 'text' in upload]
+        if new_documents:
+            timestamp = datetime.utcnow().isoformat()
+            metadatas = [
+                {"source": upload['filename'], "timestamp": timestamp, "user_id": user_id}
+                for upload in new_documents
+            ]
+            collection.add(
+                ids=[upload['content_id'] for upload in new_documents],
+                documents=[upload['text'] for upload in new_documents],
+                metadatas=metadatas
+            )
+            index_documents(chunk_collection, [
+                (upload['content_id'], upload['text'], metadata)
+                for upload, metadata in zip(new_documents, metadatas)
+            ])
+            for upload in new_documents:
+                content_cache.register(upload['file_hash'], upload['content_id'], upload['filename'])
+
+        for upload in accepted:
+            original = upload.pop('duplicate_of', None)
+            if original is not None:
+                if 'text' in original:
+                    upload.update(content_id=original['content_id'], text=original['text'], cached=True)
+                else:
+                    upload['error'] = original.get('error', "Text extraction failed")
+
+        # Text previews for cache hits come from Chroma in one round trip
+        cached_uploads = [upload for upload in accepted if upload.get('cached') and 'text' not in upload]
+        if cached_uploads:
+            stored = collection.get(ids=list({upload['content_id'] for upload in cached_uploads}), include=["documents"])
+            texts_by_id = dict(zip(stored['ids'], stored['documents']))
+            for upload in cached_uploads:
+                if upload['content_id'] in texts_by_id:
+                    upload['text'] = texts_by_id[upload['content_id']]
+                else:
+                    upload['error'] = "Cached document is missing, upload it again"
+
+        history_docs = []
+        for upload in accepted:
+            if 'error' in upload:
+                continue
+            text = upload['text']
+            history_doc = {
+                "doc_id": upload['doc_id'],
+                "content_id": upload['content_id'],
+                "file_hash": upload['file_hash'],
+                "filename": upload['filename'],
+                "timestamp": datetime.utcnow(),
+                "status": "uploaded",
+                "user_id": user_id,
+                "text_preview": text[:200] + "..." if len(text) > 200 else text
+            }
+            cached_summary = content_cache.get_summary(upload['file_hash']) if upload.get('cached') else None
+            if cached_summary:
+                history_doc.update({
+                    "status": "completed",
+                    "progress": 100,
+                    "summary": cached_summary['summary'],
+                    "advantages": cached_summary['advantages'],
+                    "disadvantages": cached_summary['disadvantages'],
+                    "last_updated": datetime.utcnow()
+                })
+            history_docs.append(history_doc)
+        if history_docs:
+            history_collection.insert_many(history_docs)
+
+        results = [
+            {"filename": upload['filename'], "status": "error", "error": upload['error']}
+            if 'error' in upload else
+            {"filename": upload['filename'], "status": "uploaded", "doc_id": upload['doc_id'],
+             "cached": bool(upload.get('cached'))}
+            for upload in uploads
+        ]
+        return jsonify({
+            "results": results,
+            "uploaded": len(history_docs),
+            "failed": len(results) - len(history_docs)
+        })
+
+    except Exception as e:
+        logger.error(f"Batch summarize error: {str(e)}")
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+    finally:
+        # Text lives in Chroma once extracted; the spooled files are not needed again
+        if not Config.UPLOAD_RETENTION_SECONDS:
+            for upload in uploads:
+                if 'spooled' in upload:
+                    upload['spooled'].discard()
+
+@api.route('/generate_summary', methods=['POST'])
 def generate_summary():
     try:
         data = request.get_json()
@@ -238,35 +655,189 @@ def generate_summary():
         if not doc_id:
             return jsonify({"error": "Missing document ID"}), 400
 
-        # Initialize progress
-        history_collection.update_one(
+        record = history_collection.find_one(
             {"doc_id": doc_id},
+            {"content_id": 1, "file_hash": 1, "indexing": 1, "_id": 0}
+        ) or {}
+        # Documents still being indexed are queued by run_incremental_ingest once the last page is in
+        if record.get("indexing") == "running":
+            waiting = history_collection.update_one(
+                {"doc_id": doc_id, "indexing": "running"},
+                {"$set": {"status": "waiting_for_index", "progress": 0}}
+            )
+            if waiting.matched_count:
+                progress_broker.publish(doc_id, {"doc_id": doc_id, "status": "waiting_for_index", "progress": 0})
+                return jsonify({
+                    "message": "Summary will be queued once the document is indexed",
+                    "doc_id": doc_id,
+                    "status": "waiting_for_index"
+                }), 202
+            # Indexing finished in the meantime
+
+        if not collection.get(ids=[record.get("content_id", doc_id)], include=[])['ids']:
+            return jsonify({"error": "Document not found"}), 404
+
+        # Another upload of the same file may already have been summarized
+        cached_summary = content_cache.get_summary(record['file_hash']) if record.get('file_hash') else None
+        if cached_summary:
+            history_collection.update_one(
+                {"doc_id": doc_id},
+                {"$set": {
+                    "status": "completed",
+                    "progress": 100,
+                    "summary": cached_summary['summary'],
+                    "advantages": cached_summary['advantages'],
+                    "disadvantages": cached_summary['disadvantages'],
+                    "last_updated": datetime.utcnow()
+                }}
+            )
+            progress_broker.publish(doc_id, {"doc_id": doc_id, "status": "completed", "progress": 100})
+            return jsonify({
+                "message": "Summary loaded from cache",
+                "doc_id": doc_id,
+                "status": "completed"
+            })
+
+        job_id, status = queue_summary_job(doc_id)
+        return jsonify({
+            "message": "Summary generation queued",
+            "job_id": job_id,
+            "doc_id": doc_id,
+            "status": status
+        }), 202
+
+    except QueueFullError as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        logger.error(f"Generate summary error: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+# Job state lives on the history record, so every web worker sees (and dedupes) the same jobs
+ACTIVE_JOB_STATUSES = ["queued", "processing"]
+JOB_STATUSES = {"queued": "queued", "processing": "running", "completed": "completed", "failed": "failed"}
+
+def queue_summary_job(doc_id):
+    """Queue run_summary_job for a document unless a job for it is already active in any worker.
+
+    Returns (job_id, status) of the new or the already active job.
+    """
+    job_id = str(uuid.uuid4())
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=Config.SUMMARY_JOB_STALE_SECONDS)
+    previous = history_collection.find_one_and_update(
+        {"doc_id": doc_id, "$or": [
+            {"status": {"$nin": ACTIVE_JOB_STATUSES}},
+            {"job_heartbeat": {"$lt": stale}}  # The worker running it went away
+        ]},
+        {"$set": {"status": "queued", "progress": 0, "job_id": job_id, "job_heartbeat": now}},
+        projection={"status": 1, "job_id": 1, "_id": 0}
+    )
+    if previous is None:
+        active = history_collection.find_one({"doc_id": doc_id}, {"status": 1, "job_id": 1, "_id": 0})
+        if active is None:
+            raise ValueError("Document not found")
+        return active.get("job_id"), JOB_STATUSES.get(active.get("status"), "queued")
+
+    try:
+        summary_jobs.submit(run_summary_job, doc_id, job_id, job_id=job_id)
+    except QueueFullError:
+        # Hand the record back so the document can be queued again later
+        history_collection.update_one(
+            {"doc_id": doc_id, "job_id": job_id, "status": "queued"},
+            {"$set": {"status": previous.get("status", "uploaded"), "job_id": previous.get("job_id")}}
+        )
+        raise
+    progress_broker.publish(doc_id, {"doc_id": doc_id, "status": "queued", "progress": 0, "job_id": job_id})
+    return job_id, "queued"
+
+
+@api.route('/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    record = history_collection.find_one({"job_id": job_id}, {"status": 1, "_id": 0})
+    if record is None or record.get("status") not in JOB_STATUSES:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify({"job_id": job_id, "status": JOB_STATUSES[record["status"]]})
+
+
+def persist_progress(event):
+    """Throttled progress write for web workers other than the one running the job"""
+    history_collection.update_one(
+        {"doc_id": event["doc_id"], "status": "processing"},
+        {"$set": {"progress": event["progress"], "stage": event["stage"], "job_heartbeat": datetime.utcnow()}}
+    )
+
+def run_summary_job(doc_id, job_id):
+    """Generate summary, advantages and limitations for a document on a worker.
+
+    Fine-grained progress is published to progress_broker; history_collection
+    gets it every PROGRESS_PERSIST_INTERVAL seconds, plus the
+    processing/completed/failed transitions and the results.
+    """
+    progress = JobProgress(progress_broker, doc_id, persist=persist_progress,
+                           persist_interval=Config.PROGRESS_PERSIST_INTERVAL)
+    # Claim the record; a job that was re-queued elsewhere after going stale no longer owns it
+    with stage_timer("mongo_update"):
+        claimed = history_collection.update_one(
+            {"doc_id": doc_id, "job_id": job_id, "status": "queued"},
             {"$set": {
                 "status": "processing",
                 "progress": 0,
-                "processing_start": datetime.utcnow()
+                "processing_start": datetime.utcnow(),
+                "job_heartbeat": datetime.utcnow()
             }}
         )
+    if not claimed.matched_count:
+        logger.warning(f"Summary job {job_id} for {doc_id} was superseded; skipping")
+        return
+    try:
+        # Initialize progress
+        progress.stage("loading", 0)
 
         # Get document
-        results = collection.get(ids=[doc_id], include=["documents", "metadatas"])
+        record = history_collection.find_one(
+            {"doc_id": doc_id},
+            {"content_id": 1, "file_hash": 1, "filename": 1, "_id": 0}
+        ) or {}
+        with stage_timer("chroma_get"):
+            results = collection.get(ids=[record.get("content_id", doc_id)], include=["documents", "metadatas"])
         if not results['documents']:
-            return jsonify({"error": "Document not found"}), 404
+            raise ValueError("Document not found")
 
         text = results['documents'][0]
-        filename = results['metadatas'][0].get('source', 'unknown')
+        filename = record.get('filename') or results['metadatas'][0].get('source', 'unknown')
 
-        # Extract full document sections with better coverage
+        # Raw sections for the keyword fallbacks; prompts are filled to exact token budgets below
         text_length = len(text)
         intro_section = text[:5000]  # Increased from 3000
         middle_section = text[text_length//4:3*text_length//4]  # Take middle 50%
         conclusion_section = text[-4000:]  # Increased from 2500
 
-        # Update progress - 20%
-        history_collection.update_one(
-            {"doc_id": doc_id},
-            {"$set": {"progress": 20}}
-        )
+        if Config.SUMMARY_MODE == "map_reduce":
+            # Summarize every part of the paper, then summarize the summaries
+            progress.stage("map_reduce", 20)
+            with stage_timer("map_reduce"):
+                section_summaries = map_reduce_summarize(
+                    text, tokenizer, background_generator,
+                    on_progress=lambda fraction: progress.update(20 + int(25 * fraction))
+                )
+            summary_content = """[Section Summaries]
+{section_summaries}"""
+            summary_sections = {"section_summaries": (section_summaries, 1, "head")}
+        else:
+            summary_content = """[Introduction]
+{intro_section}
+
+[Main Content]
+{middle_section}
+
+[Conclusion]
+{conclusion_section}"""
+            summary_sections = {
+                "intro_section": (text, 5, "head"),
+                "middle_section": (text, 8, "middle"),
+                "conclusion_section": (text, 4, "tail")
+            }
 
         # Enhanced summary generation prompt
         summary_prompt = f"""Write a comprehensive research paper summary in 500-600 words. Include:
@@ -298,32 +869,23 @@ def generate_summary():
 - Limitations and future directions
 - Overall research contribution
 
-Document: {filename}
+Document: {{filename}}
 
 Content:
-[Introduction]
-{intro_section}
-
-[Main Content]
-{middle_section}
-
-[Conclusion]
-{conclusion_section}
+{summary_content}
 
 Write a clear, detailed summary covering all sections."""
+        progress.stage("summary", 45 if Config.SUMMARY_MODE == "map_reduce" else 20)
+        with stage_timer("prompt_build"):
+            summary_prompt, _ = prompt_budget.build(
+                summary_prompt, 2048, key=doc_id, fixed={"filename": filename}, **summary_sections
+            )
 
         # Generate summary with enhanced parameters
-        inputs = tokenizer(
-            summary_prompt,
-            return_tensors="pt",
-            max_length=2048,  # Increased for better context
-            truncation=True,
-            padding=True
-        ).to(device)
-
-        with torch.no_grad():
-            summary_ids = model.generate(
-                inputs.input_ids,
+        with stage_timer("generate_summary"):
+            raw_summary = background_generator.generate(
+                summary_prompt,
+                max_input_length=2048,  # Increased for better context
                 max_length=800,  # Increased for longer summary
                 min_length=600,  # Ensure minimum length
                 num_beams=5,
@@ -335,19 +897,14 @@ Write a clear, detailed summary covering all sections."""
                 repetition_penalty=1.2
             )
         
-        raw_summary = tokenizer.decode(summary_ids[0], skip_special_tokens=True)
-        
         # Clean and improve summary
-        summary = clean_and_improve_text(raw_summary, target_length=600)  # Increased length
+        with stage_timer("clean_summary"):
+            summary = clean_and_improve_text(raw_summary, target_length=600)  # Increased length
 
-        # Update progress - 50%
-        history_collection.update_one(
-            {"doc_id": doc_id},
-            {"$set": {"progress": 50}}
-        )
+        progress.stage("key_points", 50)
 
         # Generate advantages with specific research focus
-        advantages_prompt = f"""Analyze this research paper and identify exactly 3 distinct strengths. Be specific and evidence-based.
+        advantages_prompt = """Analyze this research paper and identify exactly 3 distinct strengths. Be specific and evidence-based.
 
 Research Content:
 {intro_section}
@@ -367,28 +924,8 @@ Focus on:
 
 Each point should be 15-25 words and backed by evidence from the text."""
 
-        with torch.no_grad():
-            adv_ids = model.generate(
-                tokenizer(advantages_prompt, return_tensors="pt", max_length=1200, truncation=True).input_ids.to(device),
-                max_length=150,
-                temperature=0.6,
-                num_beams=4,
-                no_repeat_ngram_size=3,
-                do_sample=True,
-                repetition_penalty=1.3
-            )
-        
-        advantages_text = tokenizer.decode(adv_ids[0], skip_special_tokens=True)
-        advantages = extract_and_clean_points(advantages_text, "advantages")
-
-        # Update progress - 75%
-        history_collection.update_one(
-            {"doc_id": doc_id},
-            {"$set": {"progress": 75}}
-        )
-
         # Generate limitations with specific focus
-        disadvantages_prompt = f"""Analyze this research paper and identify exactly 3 distinct limitations. Be constructive and specific.
+        disadvantages_prompt = """Analyze this research paper and identify exactly 3 distinct limitations. Be constructive and specific.
 
 Research Content:
 {middle_section}
@@ -408,9 +945,23 @@ Focus on:
 
 Each point should be 15-25 words and explain why it's a limitation."""
 
-        with torch.no_grad():
-            disadv_ids = model.generate(
-                tokenizer(disadvantages_prompt, return_tensors="pt", max_length=1200, truncation=True).input_ids.to(device),
+        with stage_timer("prompt_build"):
+            advantages_prompt, _ = prompt_budget.build(
+                advantages_prompt, 1200, key=doc_id,
+                intro_section=(text, 1, "head"),
+                middle_section=(text, 1, "middle")
+            )
+            disadvantages_prompt, _ = prompt_budget.build(
+                disadvantages_prompt, 1200, key=doc_id,
+                middle_section=(text, 1, "middle"),
+                conclusion_section=(text, 1, "tail")
+            )
+
+        # Both prompts share settings, so they run as one padded batch
+        with stage_timer("generate_points"):
+            advantages_text, disadvantages_text = background_generator.generate_many(
+                [advantages_prompt, disadvantages_prompt],
+                max_input_length=1200,
                 max_length=150,
                 temperature=0.6,
                 num_beams=4,
@@ -418,132 +969,70 @@ Each point should be 15-25 words and explain why it's a limitation."""
                 do_sample=True,
                 repetition_penalty=1.3
             )
-        
-        disadvantages_text = tokenizer.decode(disadv_ids[0], skip_special_tokens=True)
-        disadvantages = extract_and_clean_points(disadvantages_text, "disadvantages")
 
-        # Final quality validation
-        if len(advantages) < 3:
-            advantages = generate_fallback_advantages(intro_section, middle_section)
-        if len(disadvantages) < 3:
-            disadvantages = generate_fallback_limitations(middle_section, conclusion_section)
+        progress.stage("post_processing", 75)
+
+        with stage_timer("extract_points"):
+            advantages = extract_and_clean_points(advantages_text, "advantages")
+            disadvantages = extract_and_clean_points(disadvantages_text, "disadvantages")
+
+            # Final quality validation
+            if len(advantages) < 3:
+                advantages = generate_fallback_advantages(intro_section, middle_section)
+            if len(disadvantages) < 3:
+                disadvantages = generate_fallback_limitations(middle_section, conclusion_section)
 
-        # Ensure no overlap between advantages and disadvantages
-        advantages, disadvantages = ensure_distinct_points(advantages, disadvantages)
+            # Ensure no overlap between advantages and disadvantages
+            advantages, disadvantages = ensure_distinct_points(advantages, disadvantages)
 
         # Save results
-        history_collection.update_one(
-            {"doc_id": doc_id},
-            {"$set": {
-                "status": "completed",
-                "progress": 100,
-                "summary": summary,
-                "advantages": advantages,
-                "disadvantages": disadvantages,
-                "last_updated": datetime.utcnow()
-            }}
-        )
+        with stage_timer("mongo_update"):
+            history_collection.update_one(
+                {"doc_id": doc_id, "job_id": job_id},
+                {"$set": {
+                    "status": "completed",
+                    "progress": 100,
+                    "summary": summary,
+                    "advantages": advantages,
+                    "disadvantages": disadvantages,
+                    "timings": progress.timings,
+                    "last_updated": datetime.utcnow()
+                }}
+            )
+        progress.finish("completed")
+        if record.get('file_hash'):
+            content_cache.store_summary(record['file_hash'], summary, advantages, disadvantages)
 
         # Clear CUDA cache
+        import torch
         if torch.cuda.is_available():
             torch.cuda.empty_cache()
 
-        return jsonify({
-            "summary": summary,
-            "advantages": advantages,
-            "disadvantages": disadvantages,
-            "doc_id": doc_id,
-            "source": filename
-        })
-
     except Exception as e:
         logger.error(f"Generate summary error: {str(e)}")
         history_collection.update_one(
-            {"doc_id": doc_id},
+            {"doc_id": doc_id, "job_id": job_id},
             {"$set": {
                 "status": "failed",
                 "error": str(e)
             }}
         )
-        return jsonify({"error": str(e)}), 500
+        progress.finish("failed", error=str(e))
+        raise
 
 
 def clean_and_improve_text(text, target_length=250):
     """Clean and improve generated text quality"""
-    import re
-    
-    # Remove the original prompt if it appears in output
-    text = re.sub(r'^.*?Write.*?summary.*?:', '', text, flags=re.DOTALL | re.IGNORECASE)
-    text = re.sub(r'^.*?Document Title.*?:', '', text, flags=re.DOTALL | re.IGNORECASE)
-    
-    # Fix common grammar issues
-    text = re.sub(r'\s+', ' ', text)  # Multiple spaces
-    text = re.sub(r'([.!?])\s*([a-z])', r'\1 \2', text)  # Space after punctuation
-    text = re.sub(r'([a-z])([A-Z])', r'\1. \2', text)  # Missing periods
-    
-    # Split into sentences and clean
-    sentences = [s.strip() for s in re.split(r'[.!?]+', text) if s.strip()]
-    
-    # Rebuild with proper capitalization
-    cleaned_sentences = []
-    for sentence in sentences:
-        if sentence:
-            sentence = sentence[0].upper() + sentence[1:] if len(sentence) > 1 else sentence.upper()
-            cleaned_sentences.append(sentence)
-    
-    # Join and trim to target length
-    result = '. '.join(cleaned_sentences)
-    
-    # Trim to approximately target word count
-    words = result.split()
-    if len(words) > target_length:
-        result = ' '.join(words[:target_length])
-        # Ensure it ends with proper punctuation
-        if not result.endswith(('.', '!', '?')):
-            result += '.'
-    
-    return result
+    return polish_summary(text, target_length)
 
 
 def extract_and_clean_points(text, point_type):
     """Extract and clean advantage/disadvantage points"""
-    import re
-    
-    # Remove prompt text if it appears
-    text = re.sub(r'^.*?List \d+.*?:', '', text, flags=re.DOTALL | re.IGNORECASE)
-    text = re.sub(r'^.*?Focus on.*?:', '', text, flags=re.DOTALL | re.IGNORECASE)
-    
-    # Extract numbered points
-    points = []
-    patterns = [
-        r'(\d+\.?\s*[^\n]+)',  # 1. Point
-        r'([•\-]\s*[^\n]+)',   # • Point or - Point
-        r'([^\n]+)'            # Any line
-    ]
-    
-    for pattern in patterns:
-        matches = re.findall(pattern, text)
-        if matches and len(matches) >= 2:
-            points = matches
-            break
-    
-    # Clean and filter points
-    cleaned_points = []
-    for point in points:
-        # Remove numbering and bullets
-        clean_point = re.sub(r'^\d+\.?\s*', '', point).strip()
-        clean_point = re.sub(r'^[•\-]\s*', '', clean_point).strip()
-        
-        # Filter quality points
-        if (len(clean_point.split()) >= 10 and 
-            len(clean_point.split()) <= 30 and
-            clean_point not in cleaned_points):
-            cleaned_points.append(clean_point)
-        
-        if len(cleaned_points) >= 3:
-            break
+    # Keep quality points only
+    cleaned_points = [point for point in split_points(text) if 10 <= len(point.split()) <= 30]
     
-    return cleaned_points[:3]
+    # Near-duplicates (not only exact repeats) count once
+    return point_similarity.dedupe(cleaned_points, Config.POINT_SIMILARITY_THRESHOLD)[:3]
 
 
 def generate_fallback_advantages(intro_section, middle_section):
@@ -594,36 +1083,66 @@ def generate_fallback_limitations(middle_section, conclusion_section):
 
 def ensure_distinct_points(advantages, disadvantages):
     """Ensure advantages and disadvantages are distinct and non-overlapping"""
-    import difflib
-    
-    cleaned_advantages = []
-    cleaned_disadvantages = []
-    
-    # Check for similarity between advantages and disadvantages
-    for adv in advantages:
-        is_similar = False
-        for disadv in disadvantages:
-            similarity = difflib.SequenceMatcher(None, adv.lower(), disadv.lower()).ratio()
-            if similarity > 0.6:  # 60% similarity threshold
-                is_similar = True
-                break
-        if not is_similar:
-            cleaned_advantages.append(adv)
-    
-    # Ensure we have distinct disadvantages
-    for disadv in disadvantages:
-        is_similar = False
-        for adv in advantages:
-            similarity = difflib.SequenceMatcher(None, disadv.lower(), adv.lower()).ratio()
-            if similarity > 0.6:
-                is_similar = True
-                break
-        if not is_similar:
-            cleaned_disadvantages.append(disadv)
-    
+    # Points similar to any point on the other side are dropped from both
+    cleaned_advantages, cleaned_disadvantages = point_similarity.distinct_across(
+        advantages, disadvantages, Config.POINT_SIMILARITY_THRESHOLD
+    )
     return cleaned_advantages[:3], cleaned_disadvantages[:3]
 
-@app.route('/ask', methods=['POST'])
+def ask_cache_params(decoding):
+    """Everything besides document and question that determines an /ask answer"""
+    return {
+        "model": Config.LLM_MODEL,
+        "backend": Config.INFERENCE_BACKEND,
+        "top_k": Config.TOP_K,
+        "max_length": 200,
+        "decoding": decoding
+    }
+
+def lookup_cached_answer(content_id, question, cache_params):
+    """Exact-match cache first, then (if enabled) the semantic cache; None on a miss"""
+    answer = answer_cache.get(content_id, question, cache_params)
+    if answer is None and Config.SEMANTIC_CACHE_ENABLED:
+        match = semantic_cache.lookup(content_id, question, json.dumps(cache_params, sort_keys=True))
+        if match:
+            answer = match[0]
+    return answer
+
+def store_answer(content_id, question, cache_params, answer):
+    answer_cache.put(content_id, question, cache_params, answer)
+    if Config.SEMANTIC_CACHE_ENABLED:
+        semantic_cache.add(content_id, question, json.dumps(cache_params, sort_keys=True), answer)
+
+def build_ask_prompt(content_id, question):
+    """Build the /ask prompt from the most relevant chunks, or None if the document is unknown"""
+    with stage_timer("retrieve_chunks"):
+        chunks = retrieve_chunks(chunk_collection, content_id, question)
+    if not chunks:
+        # Documents uploaded before chunk indexing existed are indexed on first use
+        results = collection.get(ids=[content_id], include=["documents", "metadatas"])
+        if not results['documents']:
+            return None
+        index_document(chunk_collection, content_id, results['documents'][0], results['metadatas'][0])
+        chunks = retrieve_chunks(chunk_collection, content_id, question)
+        
+    prompt, _ = prompt_budget.build(
+        "Answer based on the paper:\nQuestion: {question}\nContext: {context}",
+        512,
+        fixed={"question": question},
+        context=("\n".join(chunks), 1, "head")
+    )
+    return prompt
+
+def not_indexed_yet_response(indexing):
+    """/ask on an incrementally ingested document before any page with text is indexed"""
+    return jsonify({"error": "Document is still being indexed, try again shortly", **indexing}), 409
+
+def admission_rejected_response(error):
+    response = jsonify({"error": str(error), "retry_after": error.retry_after})
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response, 503
+
+@api.route('/ask', methods=['POST'])
 def ask_question():
     try:
         data = request.get_json()
@@ -633,49 +1152,242 @@ def ask_question():
         if not question or not doc_id:
             return jsonify({"error": "Missing question or document ID"}), 400
             
-        results = collection.get(ids=[doc_id], include=["documents"])
-        if not results['documents']:
-            return jsonify({"error": "Document not found"}), 404
+        content_id, indexing = resolve_document(doc_id)
+        cache_params = ask_cache_params("beam")
+        answer = lookup_cached_answer(content_id, question, cache_params)
+        if answer is not None:
+            return jsonify({"answer": answer, "cached": True})
             
-        context = results['documents'][0][:5000]
-        prompt = f"Answer based on the paper:\nQuestion: {question}\nContext: {context}"
+        prompt = build_ask_prompt(content_id, question)
+        if prompt is None:
+            if indexing:
+                return not_indexed_yet_response(indexing)
+            return jsonify({"error": "Document not found"}), 404
         
-        answer = generate_response(prompt, max_length=200)
+        with stage_timer("generate_answer"):
+            answer = generate_response(prompt, max_length=200)
+        if indexing:
+            # Answered from the pages indexed so far; later pages may change it, so it is not cached
+            return jsonify({"answer": answer, "partial": True, **indexing})
+        store_answer(content_id, question, cache_params, answer)
         return jsonify({"answer": answer})
         
+    except AdmissionRejected as e:
+        return admission_rejected_response(e)
     except Exception as e:
         logger.error(f"Ask question error: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
 
-@app.route('/history', methods=['GET'])
+@api.route('/ask/stream', methods=['POST'])
+def ask_question_stream():
+    """Same as /ask, but streams the answer as Server-Sent Events while it is decoded"""
+    try:
+        data = request.get_json()
+        question = data.get('question', '').strip()
+        doc_id = data.get('doc_id')
+        
+        if not question or not doc_id:
+            return jsonify({"error": "Missing question or document ID"}), 400
+            
+        content_id, indexing = resolve_document(doc_id)
+        cache_params = ask_cache_params("greedy")
+        cached_answer = lookup_cached_answer(content_id, question, cache_params)
+        if cached_answer is not None:
+            def cached_events():
+                yield f"data: {json.dumps({'token': cached_answer, 'cached': True})}\n\n"
+                yield "event: done\ndata: {}\n\n"
+            return Response(cached_events(), mimetype='text/event-stream', headers={"Cache-Control": "no-cache"})
+            
+        prompt = build_ask_prompt(content_id, question)
+        if prompt is None:
+            if indexing:
+                return not_indexed_yet_response(indexing)
+            return jsonify({"error": "Document not found"}), 404
+        
+        # Beam search cannot emit tokens before it finishes, so streaming decodes greedily.
+        # Admission happens here, so a full queue is still a 503 rather than a broken stream.
+        tokens = generator.stream(prompt, max_input_length=512, timeout=120,
+                                  max_length=200, do_sample=False, no_repeat_ngram_size=3)
+        
+        def events():
+            pieces = []
+            try:
+                for token in tokens:
+                    pieces.append(token)
+                    yield f"data: {json.dumps({'token': token})}\n\n"
+                if indexing:
+                    yield f"event: done\ndata: {json.dumps({'partial': True, **indexing})}\n\n"
+                    return
+                store_answer(content_id, question, cache_params, "".join(pieces))
+                yield "event: done\ndata: {}\n\n"
+            except queue.Empty:
+                yield f"event: error\ndata: {json.dumps({'error': 'Generation timed out'})}\n\n"
+            except Exception as e:
+                logger.error(f"Ask stream generation error: {str(e)}")
+                yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+            finally:
+                tokens.close()
+        
+        return Response(
+            stream_with_context(events()),
+            mimetype='text/event-stream',
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+        
+    except AdmissionRejected as e:
+        return admission_rejected_response(e)
+    except Exception as e:
+        logger.error(f"Ask stream error: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+# Summary bodies are fetched per document via /document/<doc_id>
+HISTORY_LIST_PROJECTION = {
+    "_id": 0, "doc_id": 1, "filename": 1, "timestamp": 1, "status": 1, "progress": 1,
+    "indexing": 1, "pages_indexed": 1, "pages_total": 1
+}
+HISTORY_PAGE_SIZE = 50
+HISTORY_MAX_PAGE_SIZE = 200
+
+def encode_history_cursor(doc):
+    position = [doc['timestamp'].isoformat(), doc['doc_id']]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+def decode_history_cursor(cursor):
+    """(timestamp, doc_id) of the last item already seen, or None for the first page"""
+    if not cursor:
+        return None
+    try:
+        timestamp, doc_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(timestamp), doc_id
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+@api.route('/history', methods=['GET'])
 def get_history():
     try:
         user_id = request.args.get('user_id')
         if not user_id:
             return jsonify({"error": "No user_id provided"}), 400
             
-        print(f"Fetching history for user_id: {user_id}")  # Debug log
+        try:
+            limit = min(max(int(request.args.get('limit', HISTORY_PAGE_SIZE)), 1), HISTORY_MAX_PAGE_SIZE)
+            after = decode_history_cursor(request.args.get('cursor'))
+        except ValueError:
+            return jsonify({"error": "Invalid limit or cursor"}), 400
         
-        # Get documents from MongoDB, sorted by timestamp
-        documents = list(history_collection.find(
-            {"user_id": user_id},
-            {"_id": 0}  # Exclude MongoDB _id
-        ).sort("timestamp", -1))  # Sort by timestamp descending
+        # Keyset pagination on (timestamp, doc_id), served by the (user_id, timestamp, doc_id) index
+        query = {"user_id": user_id}
+        if after:
+            query["$or"] = [
+                {"timestamp": {"$lt": after[0]}},
+                {"timestamp": after[0], "doc_id": {"$lt": after[1]}}
+            ]
+        documents = list(history_collection.find(query, HISTORY_LIST_PROJECTION)
+                         .sort([("timestamp", -1), ("doc_id", -1)])
+                         .limit(limit + 1))
         
-        print(f"Found {len(documents)} documents")  # Debug log
+        next_cursor = None
+        if len(documents) > limit:
+            documents = documents[:limit]
+            next_cursor = encode_history_cursor(documents[-1])
         
         # Format timestamps for frontend
         for doc in documents:
             if isinstance(doc.get('timestamp'), datetime):
                 doc['timestamp'] = doc['timestamp'].isoformat()
-                
-        return jsonify(documents)
+        
+        body = json.dumps({"items": documents, "next_cursor": next_cursor}, default=str)
+        etag = hashlib.sha1(body.encode()).hexdigest()
+        if etag in request.if_none_match:
+            return Response(status=304, headers={"ETag": f'"{etag}"'})
+        return Response(body, mimetype='application/json', headers={"ETag": f'"{etag}"'})
         
     except Exception as e:
-        print(f"Error in /history: {str(e)}")  # Debug log
+        logger.error(f"History error: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/document/<doc_id>', methods=['GET'])
+SEARCH_PAGE_SIZE = 10
+SEARCH_MAX_PAGE_SIZE = 50
+
+def search_library_page(user_id, query, offset, limit):
+    """One page of /search results: the user's documents ranked by their best matching chunk"""
+    # Re-uploads of a known file share the first uploader's chunks, tagged with that user_id
+    shared = history_collection.distinct(
+        "content_id",
+        {"user_id": user_id, "$expr": {"$ne": ["$content_id", "$doc_id"]}}
+    )
+    where = {"user_id": user_id}
+    if shared:
+        where = {"$or": [where, {"doc_id": {"$in": shared}}]}
+
+    # Enough chunks to fill the page with distinct documents in the usual case;
+    # later pages ask Chroma for more, up to SEARCH_MAX_CANDIDATES
+    n_results = min(Config.SEARCH_MAX_CANDIDATES, (offset + limit + 1) * Config.SEARCH_PASSAGES_PER_DOC * 2)
+    with stage_timer("search_chunks"):
+        hits = search_chunks(chunk_collection, query, where, n_results)
+    groups = group_by_document(hits, Config.SEARCH_PASSAGES_PER_DOC)
+
+    # Chunks are keyed by content_id; show the user's newest upload of each
+    content_ids = [group['doc_id'] for group in groups]
+    records = {}
+    if content_ids:
+        for record in history_collection.find(
+            {"user_id": user_id, "$or": [{"content_id": {"$in": content_ids}}, {"doc_id": {"$in": content_ids}}]},
+            {"_id": 0, "doc_id": 1, "content_id": 1, "filename": 1, "timestamp": 1, "status": 1}
+        ).sort("timestamp", -1):
+            records.setdefault(record.get("content_id", record["doc_id"]), record)
+
+    documents = []
+    for group in groups:
+        record = records.get(group['doc_id'])
+        if record:
+            documents.append({
+                "doc_id": record['doc_id'],
+                "filename": record.get('filename'),
+                "timestamp": record['timestamp'].isoformat() if isinstance(record.get('timestamp'), datetime) else None,
+                "status": record.get('status'),
+                "score": group['score'],
+                "passages": group['passages']
+            })
+
+    # A full candidate set may have cut off documents that belong on later pages
+    has_more = len(documents) > offset + limit or (len(hits) == n_results and n_results < Config.SEARCH_MAX_CANDIDATES)
+    return {
+        "items": documents[offset:offset + limit],
+        "next_offset": offset + limit if has_more else None
+    }
+
+@api.route('/search', methods=['GET'])
+def search_library():
+    """Semantic search over the chunks of every document a user uploaded"""
+    try:
+        user_id = request.args.get('user_id')
+        query = request.args.get('q', '').strip()
+        if not user_id:
+            return jsonify({"error": "No user_id provided"}), 400
+        if not query:
+            return jsonify({"error": "Missing search query"}), 400
+            
+        try:
+            limit = min(max(int(request.args.get('limit', SEARCH_PAGE_SIZE)), 1), SEARCH_MAX_PAGE_SIZE)
+            offset = max(int(request.args.get('offset', 0)), 0)
+        except ValueError:
+            return jsonify({"error": "Invalid limit or offset"}), 400
+        
+        future = search_pool.submit(search_library_page, user_id, query, offset, limit)
+        try:
+            return jsonify(future.result(timeout=Config.SEARCH_TIMEOUT))
+        except FutureTimeout:
+            future.cancel()  # Still queued behind other searches: never start it
+            response = jsonify({"error": "Search timed out", "retry_after": 1})
+            response.headers["Retry-After"] = "1"
+            return response, 503
+        
+    except Exception as e:
+        logger.error(f"Search error: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+@api.route('/document/<doc_id>', methods=['GET'])
 def get_document_details(doc_id):
     try:
         user_id = request.args.get('user_id')
@@ -696,10 +1408,10 @@ def get_document_details(doc_id):
         return jsonify(document)
         
     except Exception as e:
-        print(f"Error in /document/{doc_id}: {str(e)}")
+        logger.error(f"Document {doc_id} error: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/update-account', methods=['POST'])
+@api.route('/update-account', methods=['POST'])
 def update_account():
     try:
         data = request.get_json()
@@ -727,7 +1439,7 @@ def update_account():
         logger.error(f"Update account error: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
 
-@app.route('/delete-account', methods=['DELETE'])
+@api.route('/delete-account', methods=['DELETE'])
 def delete_account():
     try:
         data = request.get_json()
@@ -740,15 +1452,27 @@ def delete_account():
         users_collection = db['users']
             
         # Delete user's documents from history
+        content_ids = {
+            record.get("content_id", record["doc_id"])
+            for record in history_collection.find({"user_id": user_id}, {"doc_id": 1, "content_id": 1, "_id": 0})
+        }
         history_collection.delete_many({"user_id": user_id})
         
-        # Delete user's documents from ChromaDB
-        results = collection.get(
-            where={"user_id": user_id},
-            include=["metadatas"]
-        )
-        if results and results['ids']:
-            collection.delete(ids=results['ids'])
+        # Delete user's documents from ChromaDB, unless another user uploaded the same file
+        orphaned = [
+            content_id for content_id in content_ids
+            if not history_collection.find_one(
+                {"$or": [{"content_id": content_id}, {"doc_id": content_id}]},
+                {"_id": 1}
+            )
+        ]
+        if orphaned:
+            collection.delete(ids=orphaned)
+            for content_id in orphaned:
+                delete_document_chunks(chunk_collection, doc_id=content_id)
+            content_cache.forget(orphaned)
+            answer_cache.invalidate(orphaned)
+            semantic_cache.invalidate(orphaned)
         
         # Delete user account
         result = users_collection.delete_one({"user_id": user_id})
@@ -762,13 +1486,47 @@ def delete_account():
         logger.error(f"Delete account error: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
 
-@app.route('/summary-progress/<doc_id>', methods=['GET'])
+@api.route('/inference-stats', methods=['GET'])
+def get_inference_stats():
+    if not model_bundle.ready:
+        return jsonify({"model": model_bundle.status(), "admission": admission_stats()})
+    # Admission stats come with the generator's, from the model servers in serve.py mode
+    return jsonify(generator.stats())
+
+@api.route('/cache-stats', methods=['GET'])
+def get_cache_stats():
+    return jsonify({"answers": answer_cache.stats(), "semantic": semantic_cache.stats()})
+
+@api.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    if not metrics.enabled:
+        return jsonify({"error": "Metrics are disabled"}), 404
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+def load_durable_progress(doc_id):
+    return history_collection.find_one(
+        {"doc_id": doc_id},
+        {"doc_id": 1, "status": 1, "progress": 1, "stage": 1, "error": 1, "_id": 0}
+    )
+
+def current_progress(doc_id):
+    """Latest progress from this process's broker, or from Mongo when it is ahead.
+
+    Mongo is ahead when the job runs in another web worker; it also covers
+    documents this process has published nothing for.
+    """
+    latest = progress_broker.latest(doc_id)
+    if latest and latest.get("status") in TERMINAL_STATUSES:
+        return latest
+    durable = load_durable_progress(doc_id)
+    if durable and (not latest or progress_advanced(durable, latest)):
+        return durable
+    return latest
+
+@api.route('/summary-progress/<doc_id>', methods=['GET'])
 def get_summary_progress(doc_id):
     try:
-        doc = history_collection.find_one(
-            {"doc_id": doc_id},
-            {"status": 1, "progress": 1, "_id": 0}
-        )
+        doc = current_progress(doc_id)
         if not doc:
             return jsonify({"error": "Document not found"}), 404
             
@@ -776,24 +1534,150 @@ def get_summary_progress(doc_id):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@api.route('/summary-progress/<doc_id>/stream', methods=['GET'])
+def stream_summary_progress(doc_id):
+    """Push progress events for a document as Server-Sent Events until the job ends"""
+    def sse(event):
+        return f"data: {json.dumps(event)}\n\n"
+
+    def events():
+        # Subscribe before reading the current state so no event is missed in between
+        subscription = progress_broker.subscribe(doc_id)
+        try:
+            current = current_progress(doc_id)
+            if not current:
+                yield sse({"error": "Document not found"})
+                return
+            yield sse(current)
+            if current.get("status") in TERMINAL_STATUSES:
+                return
+            last = current
+            while True:
+                try:
+                    event = subscription.get(timeout=Config.PROGRESS_PERSIST_INTERVAL)
+                except queue.Empty:
+                    # Jobs running in another web worker only reach this process through Mongo
+                    durable = load_durable_progress(doc_id)
+                    if not durable or not progress_advanced(durable, last):
+                        yield ": keepalive\n\n"
+                        continue
+                    event = durable
+                yield sse(event)
+                last = event
+                if event.get("status") in TERMINAL_STATUSES:
+                    return
+        finally:
+            progress_broker.unsubscribe(doc_id, subscription)
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Health checks
+@api.route('/health/live')
+def liveness():
+    """The process is up and serving requests; says nothing about the model"""
+    return jsonify({"status": "alive"})
+
+@api.route('/health/ready')
+def readiness():
+    """Ready once every subsystem is warm; never triggers loading itself"""
+    subsystems = {resource.name: resource.status() for resource in (chroma, embeddings, model_bundle)}
+    try:
+        mongo_client.admin.command('ping')
+        subsystems["mongo"] = {"state": "ready"}
+    except Exception as e:
+        subsystems["mongo"] = {"state": "failed", "error": str(e)}
+    ready = all(status["state"] == "ready" for status in subsystems.values())
+    return jsonify({"ready": ready, "subsystems": subsystems}), 200 if ready else 503
+
 # Health check
-@app.route('/')
+@api.route('/')
 def health_check():
     return jsonify({
         "status": "healthy",
         "services": {
             "chroma": "active",
             "mongo": "active",
-            "model": "loaded"
+            "model": model_bundle.status()["state"]
         },
         "endpoints": {
             "/summarize": "POST - Upload document",
-            "/generate_summary": "POST - Generate summary",
+            "/summarize/batch": "POST - Upload many documents (or a zip) at once",
+            "/generate_summary": "POST - Queue summary generation",
+            "/jobs/<job_id>": "GET - Summary job status",
+            "/inference-stats": "GET - Batch size and queue wait histograms",
+            "/cache-stats": "GET - Answer cache hit/miss counters",
+            "/metrics": "GET - Prometheus metrics (endpoint and stage latency, token counts)",
             "/ask": "POST - Ask questions",
+            "/ask/stream": "POST - Ask questions, answer streamed as SSE",
+            "/summary-progress/<doc_id>/stream": "GET - Summary progress as SSE",
             "/history": "GET - Get document history",
-            "/document/<doc_id>": "GET - Document details"
+            "/search": "GET - Semantic search across a user's documents",
+            "/document/<doc_id>": "GET - Document details",
+            "/health/live": "GET - Liveness probe",
+            "/health/ready": "GET - Readiness probe (503 until warm)"
         }
     })
 
+def ensure_indexes():
+    """Create the Mongo indexes the hot queries rely on; safe to run on every start"""
+    indexes = [
+        (history_collection, [("user_id", 1), ("timestamp", -1), ("doc_id", -1)], {}),
+        (history_collection, [("doc_id", 1), ("user_id", 1)], {}),
+        (history_collection, [("job_id", 1)], {}),
+        (users_collection, [("email", 1)], {}),
+        (users_collection, [("user_id", 1)], {}),
+        (db['ContentCache'], [("file_hash", 1)], {"unique": True}),
+        (db['ContentCache'], [("content_id", 1)], {}),
+    ]
+    for target, keys, options in indexes:
+        try:
+            target.create_index(keys, **options)
+        except Exception as e:
+            logger.error(f"Creating index {keys} on {target.name} failed: {str(e)}")
+
+def warmup():
+    """Load every subsystem and run a dummy generate so the first real request is fast"""
+    try:
+        chroma.get()
+        embeddings.get()
+        generator.generate("Summarize: warmup.", max_length=8)
+        logger.info("Warmup complete")
+    except Exception as e:
+        logger.error(f"Warmup failed: {str(e)}")
+
+class APIRequest(Request):
+    """Request with a per-endpoint body limit: MAX_CONTENT_LENGTH, or BATCH_MAX_REQUEST_SIZE for /summarize/batch"""
+
+    @property
+    def max_content_length(self):
+        if self.endpoint == 'api.summarize_batch':
+            return Config.BATCH_MAX_REQUEST_SIZE
+        return super().max_content_length
+
+def create_app(preload=Config.PRELOAD_MODELS):
+    """Application factory; returns immediately, heavy subsystems load lazily"""
+    app = Flask(__name__)
+    app.request_class = APIRequest
+    CORS(app)
+    app.config.update(
+        UPLOAD_FOLDER=str(UPLOAD_FOLDER),
+        MAX_FILE_SIZE=10 * 1024 * 1024,  # 10MB max per document
+        MAX_CONTENT_LENGTH=Config.MAX_CONTENT_LENGTH  # Whole request; APIRequest raises it for batch uploads
+    )
+    app.register_blueprint(api)
+
+    # Index builds talk to Mongo, so they must not hold up startup
+    threading.Thread(target=ensure_indexes, name="ensure-indexes", daemon=True).start()
+    if Config.UPLOAD_RETENTION_SECONDS:
+        threading.Thread(target=run_upload_sweeper, args=(str(UPLOAD_FOLDER),),
+                         name="upload-sweeper", daemon=True).start()
+    if preload:
+        threading.Thread(target=warmup, name="warmup", daemon=True).start()
+    return app
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, threaded=True)
\ No newline at end of file
+    create_app().run(host='0.0.0.0', port=5000, threaded=True)
\ No newline at end of file
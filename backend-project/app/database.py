@@ -1,10 +0,0 @@
-# app/database.py
-from pymongo import MongoClient
-import os
-
-def get_db():
-    client = MongoClient(
-        host=os.getenv('MONGO_HOST'),
-        # ... your connection config ...
-    )
-    return client[os.getenv('MONGO_DB')]
\ No newline at end of file
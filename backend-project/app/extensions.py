@@ -1,5 +0,0 @@
-from flask_pymongo import PyMongo
-from flask_cors import CORS
-
-db = PyMongo()
-cors = CORS()
\ No newline at end of file
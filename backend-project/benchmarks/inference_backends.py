@@ -0,0 +1,91 @@
+"""Compare FLAN-T5 inference backends on CPU: latency and output similarity to fp32.
+
+Run from backend-project:
+    python -m benchmarks.inference_backends --backends fp32 int8 bf16 --runs 3 --output backends.json
+"""
+import argparse
+import difflib
+import json
+import statistics
+import time
+import torch
+from transformers import T5Tokenizer, T5ForConditionalGeneration
+from config import Config
+from utils.inference_backend import BACKENDS, configure_threads, prepare_model
+
+PROMPTS = [
+    "Summarize: Transformers use self-attention to model long-range dependencies in sequences, "
+    "replacing recurrence and allowing training to be parallelized across positions.",
+    "Answer based on the paper:\nQuestion: What dataset was used?\nContext: We evaluate on the "
+    "CIFAR-10 benchmark, which contains 60,000 32x32 colour images in 10 classes.",
+    "Analyze this research paper and identify exactly 3 distinct limitations. Research Content: "
+    "The survey sampled 120 undergraduate students from a single university using self-reported questionnaires.",
+    "Summarize: Protein structure prediction was transformed by deep learning models that combine "
+    "multiple sequence alignments with attention over residue pairs.",
+]
+
+# Same decoding settings as generate_response in app.py
+GENERATION = dict(max_length=200, min_length=100, num_beams=4, no_repeat_ngram_size=3, early_stopping=True)
+
+
+def run_backend(backend, tokenizer, runs):
+    device = torch.device("cpu")
+    model = T5ForConditionalGeneration.from_pretrained(Config.LLM_MODEL).to(device)
+    model = prepare_model(model, backend, device)
+    model.eval()
+
+    inputs = [tokenizer(prompt, return_tensors="pt", max_length=512, truncation=True) for prompt in PROMPTS]
+    latencies, outputs = [], []
+    with torch.no_grad():
+        model.generate(**inputs[0], max_length=8)  # warmup
+        for encoded in inputs:
+            timings = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                output_ids = model.generate(**encoded, **GENERATION)
+                timings.append(time.perf_counter() - started)
+            latencies.append(statistics.median(timings))
+            outputs.append(tokenizer.decode(output_ids[0], skip_special_tokens=True))
+    return latencies, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--runs", type=int, default=3, help="timed runs per prompt (median is reported)")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    configure_threads()
+    tokenizer = T5Tokenizer.from_pretrained(Config.LLM_MODEL)
+    backends = ["fp32"] + [backend for backend in args.backends if backend != "fp32"]
+
+    results, reference = {}, None
+    for backend in backends:
+        latencies, outputs = run_backend(backend, tokenizer, args.runs)
+        reference = reference or outputs
+        similarity = [difflib.SequenceMatcher(None, out, ref).ratio() for out, ref in zip(outputs, reference)]
+        results[backend] = {
+            "median_latency_s": round(statistics.median(latencies), 4),
+            "per_prompt_latency_s": [round(latency, 4) for latency in latencies],
+            "mean_similarity_to_fp32": round(statistics.mean(similarity), 4),
+            "outputs": outputs
+        }
+
+    baseline = results["fp32"]["median_latency_s"]
+    print(f"{'backend':<8} {'median s':>10} {'speedup':>8} {'similarity':>11}")
+    for backend, result in results.items():
+        print(f"{backend:<8} {result['median_latency_s']:>10.3f} "
+              f"{baseline / result['median_latency_s']:>7.2f}x {result['mean_similarity_to_fp32']:>11.3f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "model": Config.LLM_MODEL,
+                "threads": torch.get_num_threads(),
+                "results": results
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
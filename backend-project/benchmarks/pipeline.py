@@ -0,0 +1,291 @@
+"""Offline benchmark of the extraction, summarization, QA and search pipeline.
+
+Mongo is replaced by in-memory collections, Chroma writes to a temporary
+directory and the Hugging Face hub is put in offline mode, so the run needs
+no services or network. The T5 checkpoint (--model) and the embedding model
+(--embedding-model) must already be in the local Hugging Face cache, or be
+local paths.
+
+Run from backend-project:
+    python -m benchmarks.pipeline --model google/flan-t5-small --output pipeline.json
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from config import Config
+
+WORDS = (
+    "model data analysis results method study participants significant effect framework "
+    "training evaluation baseline accuracy dataset approach performance sample variance "
+    "hypothesis experiment observed increase decrease compared proposed network learning "
+    "limitation future work findings contribution theory practical implication survey"
+).split()
+
+QUESTIONS = [
+    "What dataset was used?",
+    "What is the main contribution of the paper?",
+    "Which baseline does the method compare against?",
+    "What are the limitations of the study?",
+    "How was the model evaluated?",
+]
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def synthetic_text(rng, words):
+    sentences = []
+    while words > 0:
+        length = rng.randint(8, 20)
+        sentence = " ".join(rng.choice(WORDS) for _ in range(length))
+        sentences.append(sentence[0].upper() + sentence[1:] + ".")
+        words -= length
+    return " ".join(sentences)
+
+
+def make_documents(directory, rng, pages):
+    """Write a PDF, a DOCX and a TXT file with the same synthetic content per page"""
+    import docx
+    import fitz
+
+    page_texts = [synthetic_text(rng, 450) for _ in range(pages)]
+    paths = {ext: directory / f"synthetic.{ext}" for ext in ("pdf", "docx", "txt")}
+
+    with fitz.open() as pdf:
+        for text in page_texts:
+            page = pdf.new_page()
+            page.insert_textbox(page.rect + (50, 50, -50, -50), text, fontsize=9)
+        pdf.save(paths["pdf"])
+
+    document = docx.Document()
+    for text in page_texts:
+        document.add_paragraph(text)
+    document.save(paths["docx"])
+
+    paths["txt"].write_text("\n\n".join(page_texts), encoding="utf-8")
+    return paths
+
+
+def timed(fn, runs):
+    """Median wall-clock seconds of fn() over `runs` calls, and its last result"""
+    timings, result = [], None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), result
+
+
+def use_stand_ins(app_module, workdir):
+    """Point the app at in-memory collections and a temporary Chroma/upload directory"""
+    from benchmarks.stand_ins import MemoryDatabase
+    from utils.answer_cache import AnswerCache
+    from utils.content_cache import ContentCache
+
+    db = MemoryDatabase()
+    app_module.db = db
+    app_module.history_collection = db['History']
+    app_module.users_collection = db['users']
+    app_module.content_cache = ContentCache(db['ContentCache'])
+    app_module.answer_cache = AnswerCache(
+        max_entries=Config.ANSWER_CACHE_SIZE,
+        ttl_seconds=Config.ANSWER_CACHE_TTL,
+        mongo_collection=db['AnswerCache']
+    )
+    app_module.BASE_DIR = workdir  # load_chroma creates chroma_db under it
+    app_module.UPLOAD_FOLDER = workdir / 'uploads'
+    app_module.UPLOAD_FOLDER.mkdir()
+
+
+def bench_extraction(app_module, paths, runs):
+    results = {}
+    for ext, path in paths.items():
+        size_mb = path.stat().st_size / (1024 * 1024)
+        seconds, text = timed(lambda: app_module.extract_text(str(path), ext), runs)
+        results[ext] = {
+            "file_mb": round(size_mb, 3),
+            "median_s": round(seconds, 4),
+            "mb_per_s": round(size_mb / seconds, 2) if seconds else None,
+            "chars": len(text or "")
+        }
+    return results
+
+
+def bench_model(app_module, text, runs):
+    started = time.perf_counter()
+    bundle = app_module.model_bundle.get()
+    load_s = time.perf_counter() - started
+
+    prompt = f"Summarize: {text}"
+    tokenize_s, encoded = timed(
+        lambda: bundle.tokenizer(prompt, return_tensors="pt", max_length=512, truncation=True), runs
+    )
+    short_s, _ = timed(lambda: bundle.generator.generate(prompt, max_length=32), runs)
+    ask_s, _ = timed(lambda: app_module.generate_response(prompt, max_length=200), runs)
+    return {
+        "load_s": round(load_s, 3),
+        "tokenize_512_median_s": round(tokenize_s, 5),
+        "input_tokens": int(encoded.input_ids.shape[-1]),
+        "generate_32_tokens_median_s": round(short_s, 4),
+        "generate_response_200_median_s": round(ask_s, 4)
+    }
+
+
+def wait_for_job(client, job_id, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = client.get(f"/jobs/{job_id}").get_json()["status"]
+        if status in ("completed", "failed"):
+            return status
+        time.sleep(0.05)
+    return "timeout"
+
+
+def wait_for_indexing(client, doc_id, question, started, timeout):
+    """Seconds from upload to the first /ask answer and to indexing == "completed" """
+    results = {"time_to_first_answer_s": None}
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if results["time_to_first_answer_s"] is None:
+            # 409 until the first page with text is indexed
+            if client.post("/ask", json={"question": question, "doc_id": doc_id}).status_code == 200:
+                results["time_to_first_answer_s"] = round(time.perf_counter() - started, 4)
+        document = client.get(f"/document/{doc_id}", query_string={"user_id": "benchmark"}).get_json()
+        if document.get("indexing") != "running":
+            results["indexing_s"] = round(time.perf_counter() - started, 4)
+            results["indexing"] = document.get("indexing")
+            return results
+        time.sleep(0.05)
+    results["indexing"] = "timeout"
+    return results
+
+
+def bench_endpoints(client, pdf_path, questions, job_timeout):
+    results = {}
+
+    def upload():
+        with open(pdf_path, "rb") as f:
+            return client.post("/summarize", data={"file": (f, "paper.pdf"), "user_id": "benchmark"},
+                               content_type="multipart/form-data")
+
+    started = time.perf_counter()
+    response = upload()
+    results["summarize_cold_s"] = round(time.perf_counter() - started, 4)
+    doc_id = response.get_json()["doc_id"]
+    if response.get_json().get("indexing"):
+        # INCREMENTAL_INGESTION: the upload only queued extraction, so time it to usable and to done
+        results["incremental_ingestion"] = wait_for_indexing(client, doc_id, questions[0], started, job_timeout)
+    seconds, _ = timed(upload, 1)
+    results["summarize_cached_s"] = round(seconds, 4)  # same bytes: content-hash hit
+
+    started = time.perf_counter()
+    response = client.post("/generate_summary", json={"doc_id": doc_id})
+    queued_s = time.perf_counter() - started
+    job = response.get_json()
+    status = wait_for_job(client, job["job_id"], job_timeout) if "job_id" in job else job.get("status")
+    results["generate_summary"] = {
+        "queue_response_s": round(queued_s, 4),
+        "total_s": round(time.perf_counter() - started, 3),
+        "status": status
+    }
+
+    ask_timings = []
+    for question in questions:
+        seconds, _ = timed(lambda: client.post("/ask", json={"question": question, "doc_id": doc_id}), 1)
+        ask_timings.append(seconds)
+    cached_s, _ = timed(lambda: client.post("/ask", json={"question": questions[0], "doc_id": doc_id}), 1)
+    results["ask"] = {
+        "questions": len(questions),
+        "median_s": round(statistics.median(ask_timings), 4),
+        "max_s": round(max(ask_timings), 4),
+        "cached_s": round(cached_s, 5)
+    }
+
+    # Both uploads belong to the benchmark user; the cached one shares the first one's chunks
+    search_timings, statuses, hits = [], set(), []
+    for question in questions:
+        seconds, response = timed(lambda: client.get("/search", query_string={"user_id": "benchmark", "q": question}), 1)
+        search_timings.append(seconds)
+        statuses.add(response.status_code)
+        hits.append(len((response.get_json() or {}).get("items", [])))
+    results["search"] = {
+        "queries": len(questions),
+        "median_s": round(statistics.median(search_timings), 4),
+        "max_s": round(max(search_timings), 4),
+        "items": hits,
+        "status_codes": sorted(statuses)
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="google/flan-t5-small", help="T5 checkpoint name or local path")
+    parser.add_argument("--embedding-model", default=Config.EMBEDDING_MODEL,
+                        help="sentence-transformers model name or local path for chunk embeddings")
+    parser.add_argument("--pages", type=int, default=10, help="pages in the synthetic documents")
+    parser.add_argument("--runs", type=int, default=3, help="timed runs for micro-benchmarks (median is reported)")
+    parser.add_argument("--questions", type=int, default=3, choices=range(1, len(QUESTIONS) + 1))
+    parser.add_argument("--job-timeout", type=float, default=1800, help="seconds to wait for a summary job")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--allow-download", action="store_true", help="let Hugging Face fetch missing models")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    if not args.allow_download:
+        os.environ["HF_HUB_OFFLINE"] = "1"
+        os.environ["TRANSFORMERS_OFFLINE"] = "1"
+    Config.LLM_MODEL = args.model
+    Config.EMBEDDING_MODEL = args.embedding_model
+    Config.PRELOAD_MODELS = False
+
+    import app as app_module
+
+    rng = random.Random(args.seed)
+    report = {
+        "model": args.model,
+        "embedding_model": args.embedding_model,
+        "inference_backend": Config.INFERENCE_BACKEND,
+        "summary_mode": Config.SUMMARY_MODE,
+        "incremental_ingestion": Config.INCREMENTAL_INGESTION,
+        "pages": args.pages,
+        "runs": args.runs,
+        "seed": args.seed,
+        "cpu_count": os.cpu_count(),
+        "peak_rss_mb": {"start": peak_rss_mb()}
+    }
+
+    with tempfile.TemporaryDirectory(prefix="researchai-bench-") as tmp:
+        workdir = Path(tmp)
+        use_stand_ins(app_module, workdir)
+        paths = make_documents(workdir, rng, args.pages)
+
+        report["extraction"] = bench_extraction(app_module, paths, args.runs)
+        report["peak_rss_mb"]["extraction"] = peak_rss_mb()
+
+        report["model_inference"] = bench_model(app_module, paths["txt"].read_text(encoding="utf-8"), args.runs)
+        report["peak_rss_mb"]["model"] = peak_rss_mb()
+
+        client = app_module.create_app(preload=False).test_client()
+        report["endpoints"] = bench_endpoints(client, paths["pdf"], QUESTIONS[:args.questions], args.job_timeout)
+        report["peak_rss_mb"]["endpoints"] = peak_rss_mb()
+        report["batching"] = app_module.generator.stats()
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
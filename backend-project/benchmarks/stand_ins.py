@@ -0,0 +1,253 @@
+"""In-memory replacement for the pymongo collections the app uses, for offline benchmarks.
+
+Only the operations app.py and utils/ issue are supported: equality and
+$ne/$gt/$gte/$lt/$lte/$in/$nin/$exists filters, $expr field comparisons,
+$set/$setOnInsert updates (dotted paths included), inclusion/exclusion
+projections, sort/limit and distinct.
+"""
+import copy
+import threading
+from types import SimpleNamespace
+
+_MISSING = object()
+
+
+def _get_path(doc, path):
+    for part in path.split("."):
+        if not isinstance(doc, dict) or part not in doc:
+            return _MISSING
+        doc = doc[part]
+    return doc
+
+
+def _set_path(doc, path, value):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.setdefault(part, {})
+    doc[parts[-1]] = value
+
+
+def _matches_condition(value, condition):
+    if not isinstance(condition, dict) or not any(key.startswith("$") for key in condition):
+        return value == condition
+    for op, operand in condition.items():
+        present = value is not _MISSING
+        if op == "$ne" and present and value == operand:
+            return False
+        if op == "$in" and (not present or value not in operand):
+            return False
+        if op == "$nin" and present and value in operand:
+            return False
+        if op == "$exists" and present != bool(operand):
+            return False
+        if op in ("$gt", "$gte", "$lt", "$lte"):
+            if not present or value is None:
+                return False
+            if op == "$gt" and not value > operand:
+                return False
+            if op == "$gte" and not value >= operand:
+                return False
+            if op == "$lt" and not value < operand:
+                return False
+            if op == "$lte" and not value <= operand:
+                return False
+    return True
+
+
+_EXPR_OPERATORS = {
+    "$eq": lambda a, b: a == b,
+    "$ne": lambda a, b: a != b,
+    "$gt": lambda a, b: a > b,
+    "$gte": lambda a, b: a >= b,
+    "$lt": lambda a, b: a < b,
+    "$lte": lambda a, b: a <= b,
+}
+
+
+def _expr_value(doc, operand):
+    # "$field" refers to a field; a missing one compares as null, as in Mongo
+    if isinstance(operand, str) and operand.startswith("$"):
+        value = _get_path(doc, operand[1:])
+        return None if value is _MISSING else value
+    return operand
+
+
+def _matches_expr(doc, expr):
+    (op, (left, right)), = expr.items()
+    return _EXPR_OPERATORS[op](_expr_value(doc, left), _expr_value(doc, right))
+
+
+def _matches(doc, query):
+    for key, condition in (query or {}).items():
+        if key == "$expr":
+            if not _matches_expr(doc, condition):
+                return False
+        elif key == "$or":
+            if not any(_matches(doc, clause) for clause in condition):
+                return False
+        elif key == "$and":
+            if not all(_matches(doc, clause) for clause in condition):
+                return False
+        elif not _matches_condition(_get_path(doc, key), condition):
+            return False
+    return True
+
+
+def _project(doc, projection):
+    doc = copy.deepcopy(doc)
+    if not projection:
+        return doc
+    include_id = projection.get("_id", 1)
+    fields = {key: value for key, value in projection.items() if key != "_id"}
+    if fields and any(fields.values()):
+        projected = {}
+        for path in fields:
+            value = _get_path(doc, path)
+            if value is not _MISSING:
+                _set_path(projected, path, value)
+        if include_id and "_id" in doc:
+            projected["_id"] = doc["_id"]
+        return projected
+    for path in fields:
+        parts = path.split(".")
+        parent = _get_path(doc, ".".join(parts[:-1])) if len(parts) > 1 else doc
+        if isinstance(parent, dict):
+            parent.pop(parts[-1], None)
+    if not include_id:
+        doc.pop("_id", None)
+    return doc
+
+
+class MemoryCursor:
+    def __init__(self, docs):
+        self._docs = docs
+
+    def sort(self, key_or_list, direction=1):
+        keys = key_or_list if isinstance(key_or_list, list) else [(key_or_list, direction)]
+        for key, direction in reversed(keys):
+            self._docs.sort(key=lambda doc: (_get_path(doc, key) is _MISSING, _get_path(doc, key)),
+                            reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        if count:
+            self._docs = self._docs[:count]
+        return self
+
+    def __iter__(self):
+        return iter(self._docs)
+
+
+class MemoryCollection:
+    def __init__(self, name):
+        self.name = name
+        self._docs = []
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _insert(self, doc):
+        doc = copy.deepcopy(doc)
+        if "_id" not in doc:
+            self._next_id += 1
+            doc["_id"] = self._next_id
+        self._docs.append(doc)
+        return doc["_id"]
+
+    def insert_one(self, doc):
+        with self._lock:
+            return SimpleNamespace(inserted_id=self._insert(doc))
+
+    def insert_many(self, docs):
+        with self._lock:
+            return SimpleNamespace(inserted_ids=[self._insert(doc) for doc in docs])
+
+    def find_one(self, query=None, projection=None):
+        with self._lock:
+            for doc in self._docs:
+                if _matches(doc, query):
+                    return _project(doc, projection)
+        return None
+
+    def find(self, query=None, projection=None):
+        with self._lock:
+            return MemoryCursor([_project(doc, projection) for doc in self._docs if _matches(doc, query)])
+
+    def distinct(self, key, query=None):
+        """Unique values of `key` among matching documents; array values contribute their items"""
+        values = []
+        with self._lock:
+            for doc in self._docs:
+                if not _matches(doc, query):
+                    continue
+                value = _get_path(doc, key)
+                if value is _MISSING:
+                    continue
+                for item in value if isinstance(value, list) else [value]:
+                    if item not in values:
+                        values.append(copy.deepcopy(item))
+        return values
+
+    def count_documents(self, query):
+        with self._lock:
+            return sum(1 for doc in self._docs if _matches(doc, query))
+
+    def _update(self, query, update, upsert, many):
+        matched = [doc for doc in self._docs if _matches(doc, query)]
+        if not many:
+            matched = matched[:1]
+        for doc in matched:
+            for path, value in update.get("$set", {}).items():
+                _set_path(doc, path, copy.deepcopy(value))
+        if not matched and upsert:
+            doc = {key: value for key, value in query.items() if not isinstance(value, dict)}
+            for path, value in {**update.get("$setOnInsert", {}), **update.get("$set", {})}.items():
+                _set_path(doc, path, copy.deepcopy(value))
+            self._insert(doc)
+        return SimpleNamespace(matched_count=len(matched), modified_count=len(matched))
+
+    def update_one(self, query, update, upsert=False):
+        with self._lock:
+            return self._update(query, update, upsert, many=False)
+
+    def update_many(self, query, update, upsert=False):
+        with self._lock:
+            return self._update(query, update, upsert, many=True)
+
+    def find_one_and_update(self, query, update, projection=None):
+        """Like pymongo's default: the matching document as it was before the update"""
+        with self._lock:
+            before = next((copy.deepcopy(doc) for doc in self._docs if _matches(doc, query)), None)
+            self._update(query, update, upsert=False, many=False)
+        return _project(before, projection) if before is not None else None
+
+    def _delete(self, query, many):
+        removed = 0
+        kept = []
+        for doc in self._docs:
+            if _matches(doc, query) and (many or not removed):
+                removed += 1
+            else:
+                kept.append(doc)
+        self._docs = kept
+        return SimpleNamespace(deleted_count=removed)
+
+    def delete_one(self, query):
+        with self._lock:
+            return self._delete(query, many=False)
+
+    def delete_many(self, query):
+        with self._lock:
+            return self._delete(query, many=True)
+
+    def create_index(self, *args, **kwargs):
+        return None
+
+
+class MemoryDatabase:
+    def __init__(self):
+        self._collections = {}
+
+    def __getitem__(self, name):
+        if name not in self._collections:
+            self._collections[name] = MemoryCollection(name)
+        return self._collections[name]
@@ -0,0 +1,154 @@
+"""Throughput of utils.text_normalization against the regex chains it replaced.
+
+Run from backend-project:
+    python -m benchmarks.text_normalization --size-kb 100 --runs 20 --output text.json
+"""
+import argparse
+import json
+import random
+import re
+import statistics
+import time
+from utils.text_normalization import TextCleaner, clean_upload_text, polish_summary, split_points
+
+WORDS = (
+    "the model results data analysis significant participants method study effect training "
+    "evaluation baseline accuracy proposed framework we show that"
+).split()
+
+
+# Previous implementations from app.py, kept verbatim as the baseline
+def legacy_clean_text(text):
+    text = re.sub(r'http\S+|www\S+|https\S+|\s+', ' ', text)
+    return text.strip()[:100000]
+
+
+def legacy_clean_and_improve_text(text, target_length=250):
+    text = re.sub(r'^.*?Write.*?summary.*?:', '', text, flags=re.DOTALL | re.IGNORECASE)
+    text = re.sub(r'^.*?Document Title.*?:', '', text, flags=re.DOTALL | re.IGNORECASE)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'([.!?])\s*([a-z])', r'\1 \2', text)
+    text = re.sub(r'([a-z])([A-Z])', r'\1. \2', text)
+    sentences = [s.strip() for s in re.split(r'[.!?]+', text) if s.strip()]
+    cleaned_sentences = []
+    for sentence in sentences:
+        sentence = sentence[0].upper() + sentence[1:] if len(sentence) > 1 else sentence.upper()
+        cleaned_sentences.append(sentence)
+    result = '. '.join(cleaned_sentences)
+    words = result.split()
+    if len(words) > target_length:
+        result = ' '.join(words[:target_length])
+        if not result.endswith(('.', '!', '?')):
+            result += '.'
+    return result
+
+
+def legacy_split_points(text):
+    text = re.sub(r'^.*?List \d+.*?:', '', text, flags=re.DOTALL | re.IGNORECASE)
+    text = re.sub(r'^.*?Focus on.*?:', '', text, flags=re.DOTALL | re.IGNORECASE)
+    points = []
+    for pattern in [r'(\d+\.?\s*[^\n]+)', r'([•\-]\s*[^\n]+)', r'([^\n]+)']:
+        matches = re.findall(pattern, text)
+        if matches and len(matches) >= 2:
+            points = matches
+            break
+    cleaned = []
+    for point in points:
+        clean_point = re.sub(r'^\d+\.?\s*', '', point).strip()
+        cleaned.append(re.sub(r'^[•\-]\s*', '', clean_point).strip())
+    return cleaned
+
+
+def upload_text(rng, size):
+    """Extracted-PDF-like text: ragged whitespace, line breaks and the odd URL"""
+    parts, length = [], 0
+    while length < size:
+        word = rng.choice(WORDS) if rng.random() > 0.01 else f"https://doi.org/10.{rng.randint(1000, 9999)}/x"
+        parts.append(word + rng.choice([" ", " ", " ", "  ", "\n", " \t"]))
+        length += len(parts[-1])
+    return "".join(parts)[:size]
+
+
+def generated_text(rng, sentences):
+    body = " ".join(
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 18))) + rng.choice([".", ". ", "!", "."])
+        for _ in range(sentences)
+    )
+    return f"Write a comprehensive research paper summary. Document: paper.pdf: {body}"
+
+
+def generated_points(rng, count):
+    lines = "\n".join(
+        f"{i}. " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 25)))
+        for i in range(1, count + 1)
+    )
+    return f"List {count} strengths in this format: {lines}\nFocus on: methods"
+
+
+def throughput(fn, text, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn(text)
+        timings.append(time.perf_counter() - started)
+    seconds = statistics.median(timings)
+    return {"median_s": round(seconds, 6), "mb_per_s": round(len(text.encode()) / seconds / 1e6, 2)}
+
+
+def streamed(text, chunk_size=4000):
+    cleaner = TextCleaner()
+    for start in range(0, len(text), chunk_size):
+        if cleaner.feed(text[start:start + chunk_size]):
+            break
+    return cleaner.finish()
+
+
+def normalized(output):
+    # The old upload cleaner left extra spaces where it removed URLs
+    if isinstance(output, list):
+        return [normalized(item) for item in output]
+    return " ".join(output.split())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-kb", type=int, default=100, help="size of the synthetic upload text")
+    parser.add_argument("--runs", type=int, default=20, help="timed runs per function (median is reported)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    upload = upload_text(rng, args.size_kb * 1024)
+    summary = generated_text(rng, 60)
+    points = generated_points(rng, 12)
+
+    cases = {
+        "clean_text": (upload, legacy_clean_text, clean_upload_text),
+        "clean_text_streamed": (upload, legacy_clean_text, streamed),
+        "clean_and_improve_text": (summary, legacy_clean_and_improve_text, polish_summary),
+        "split_points": (points, legacy_split_points, split_points),
+    }
+    results = {}
+    for name, (text, legacy, current) in cases.items():
+        old, new = throughput(legacy, text, args.runs), throughput(current, text, args.runs)
+        results[name] = {
+            "input_kb": round(len(text) / 1024, 1),
+            "legacy": old,
+            "current": new,
+            "speedup": round(old["median_s"] / new["median_s"], 2),
+            "same_output": normalized(legacy(text)) == normalized(current(text))
+        }
+
+    print(f"{'function':<24} {'legacy MB/s':>12} {'current MB/s':>13} {'speedup':>8} {'same':>5}")
+    for name, result in results.items():
+        print(f"{name:<24} {result['legacy']['mb_per_s']:>12.2f} {result['current']['mb_per_s']:>13.2f} "
+              f"{result['speedup']:>7.2f}x {str(result['same_output']):>5}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"seed": args.seed, "runs": args.runs, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
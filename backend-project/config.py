@@ -8,6 +8,20 @@ class Config:
     UPLOAD_FOLDER = "uploads"
     ALLOWED_EXTENSIONS = {"pdf", "docx"}
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
+    UPLOAD_RETENTION_SECONDS = int(os.getenv("UPLOAD_RETENTION_SECONDS", 0))  # 0 = delete after extraction
+    UPLOAD_SWEEP_INTERVAL = 3600  # Seconds between sweeps of expired uploads
+    
+    # Batch ingestion
+    BATCH_MAX_FILES = 100
+    BATCH_MAX_REQUEST_SIZE = 256 * 1024 * 1024  # 256MB per /summarize/batch request
+    INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", os.cpu_count() or 4))  # Parallel extractions
+    
+    # PDF extraction
+    MAX_PDF_PAGES = 50
+    OCR_DPI = 300
+    OCR_MIN_PAGE_CHARS = 20  # Pages with less embedded text than this are OCR'd
+    OCR_WORKERS = int(os.getenv("OCR_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+    INCREMENTAL_INGESTION = os.getenv("INCREMENTAL_INGESTION", "true").lower() == "true"  # Index PDFs page by page in the background
     
     # Database
     MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
@@ -15,13 +29,69 @@ class Config:
     
     # Models
     LLM_MODEL = "google/flan-t5-base"
+    PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "true").lower() == "true"  # Warm up in the background at startup
+    INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "fp32")  # "fp32", "int8" (CPU) or "bf16"
+    TORCH_INTRA_OP_THREADS = int(os.getenv("TORCH_INTRA_OP_THREADS", 0))  # 0 = torch default
+    TORCH_INTER_OP_THREADS = int(os.getenv("TORCH_INTER_OP_THREADS", 0))
     EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+    PROMPT_VERSION = "2"  # Bump when summary prompts change to invalidate cached summaries
+    
+    # Summarization
+    SUMMARY_MODE = os.getenv("SUMMARY_MODE", "map_reduce")  # "map_reduce" or "single"
+    MODEL_MAX_INPUT_TOKENS = 512  # Positions FLAN-T5 attends to well
+    MAP_CHUNK_TOKENS = 400  # Document tokens per map prompt (leaves room for the instruction)
+    REDUCE_INPUT_TOKENS = 400  # Partial-summary tokens per reduce prompt; keep >= 2 map outputs
+    POINT_SIMILARITY_THRESHOLD = float(os.getenv("POINT_SIMILARITY_THRESHOLD", 0.52))  # ~ difflib ratio 0.6
     
     # RAG Parameters
     CHUNK_SIZE = 1000  # characters
     CHUNK_OVERLAP = 200
     TOP_K = 3  # Number of chunks to retrieve
     
+    # Library search (/search)
+    SEARCH_TIMEOUT = float(os.getenv("SEARCH_TIMEOUT", 2))  # Latency budget; slower searches get a 503
+    SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", 4))  # Concurrent Chroma searches
+    SEARCH_PASSAGES_PER_DOC = 3  # Best matching chunks shown per document
+    SEARCH_MAX_CANDIDATES = 500  # Most chunks fetched from Chroma for one page of results
+    
+    # /ask answer cache
+    ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", 1024))  # In-process LRU entries
+    ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", 7 * 24 * 3600))  # Seconds
+    ANSWER_CACHE_MONGO = os.getenv("ANSWER_CACHE_MONGO", "true").lower() == "true"  # Shared second tier
+    SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.9))  # Cosine similarity
+    SEMANTIC_CACHE_MAX_QUESTIONS = 256  # Remembered questions per document
+    
     # ChromaDB
     CHROMA_PATH = "chroma_db"
-    COLLECTION_NAME = "research_papers"
\ No newline at end of file
+    COLLECTION_NAME = "research_papers"
+    
+    # Summary job queue
+    SUMMARY_WORKERS = int(os.getenv("SUMMARY_WORKERS", 1))  # Concurrent summary jobs
+    SUMMARY_QUEUE_SIZE = int(os.getenv("SUMMARY_QUEUE_SIZE", 16))  # Running + waiting jobs
+    SUMMARY_JOB_STALE_SECONDS = int(os.getenv("SUMMARY_JOB_STALE_SECONDS", 900))  # A job silent this long may be re-queued
+    PROGRESS_PERSIST_INTERVAL = float(os.getenv("PROGRESS_PERSIST_INTERVAL", 2))  # Seconds between job progress writes to Mongo
+    
+    # Inference admission control
+    INFERENCE_MAX_CONCURRENT = int(os.getenv("INFERENCE_MAX_CONCURRENT", 16))  # Prompts queued or streaming; >= BATCH_MAX_SIZE
+    INFERENCE_MAX_GENERATIONS = int(os.getenv("INFERENCE_MAX_GENERATIONS", 2))  # Concurrent model.generate calls, batches and streams
+    INFERENCE_MAX_QUEUE = int(os.getenv("INFERENCE_MAX_QUEUE", 16))  # Waiting /ask requests before 503
+    INFERENCE_QUEUE_TIMEOUT = float(os.getenv("INFERENCE_QUEUE_TIMEOUT", 10))  # Seconds an /ask may wait
+    
+    # Production serving (serve.py)
+    HOST = os.getenv("HOST", "0.0.0.0")
+    PORT = int(os.getenv("PORT", 5000))
+    WEB_WORKERS = int(os.getenv("WEB_WORKERS", 2))  # waitress processes sharing the port
+    WEB_THREADS = int(os.getenv("WEB_THREADS", 8))  # Request threads per web worker
+    MODEL_WORKERS = int(os.getenv("MODEL_WORKERS", 1))  # Processes holding a copy of the model
+    MODEL_SERVER_DIR = os.getenv("MODEL_SERVER_DIR", "/tmp/researchai-models")  # Unix sockets live here
+    MODEL_SERVER_PORT = int(os.getenv("MODEL_SERVER_PORT", 5100))  # First localhost port without Unix sockets
+    MODEL_SERVER_ADDRESSES = [a for a in os.getenv("MODEL_SERVER_ADDRESSES", "").split(",") if a]  # Set by serve.py
+    MODEL_SERVER_AUTHKEY = os.getenv("MODEL_SERVER_AUTHKEY", "")
+    
+    # Instrumentation
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"  # Served at /metrics
+    
+    # Generation micro-batching
+    BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", 8))  # Prompts per generate call
+    BATCH_MAX_WAIT_MS = int(os.getenv("BATCH_MAX_WAIT_MS", 20))  # Collection window
\ No newline at end of file
@@ -0,0 +1,121 @@
+"""Production server: waitress web workers in front of shared model-server processes.
+
+    python serve.py
+
+WEB_WORKERS processes each run waitress with WEB_THREADS request threads on
+the same port; SO_REUSEPORT lets the kernel spread connections over them.
+Generation is sent to MODEL_WORKERS model-server processes over local
+sockets, so FLAN-T5 is loaded once per model worker instead of once per web
+worker. Children that exit are restarted; SIGINT/SIGTERM stops everything.
+"""
+import logging
+import multiprocessing
+import os
+import secrets
+import signal
+import socket
+import time
+from config import Config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("serve")
+
+READY_TIMEOUT = 600  # Seconds to wait for a model server to load its model
+
+
+def model_worker(address, authkey):
+    from utils.model_server import run_model_server
+    run_model_server(address, authkey)
+
+
+def web_worker(host, port, threads):
+    from waitress import serve
+    from app import create_app
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if hasattr(socket, "SO_REUSEPORT"):
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    serve(create_app(), sockets=[sock], threads=threads)
+
+
+def model_server_addresses(count):
+    if hasattr(socket, "AF_UNIX"):
+        os.makedirs(Config.MODEL_SERVER_DIR, mode=0o700, exist_ok=True)
+        return [os.path.join(Config.MODEL_SERVER_DIR, f"model-{i}.sock") for i in range(count)]
+    return [f"127.0.0.1:{Config.MODEL_SERVER_PORT + i}" for i in range(count)]
+
+
+def wait_until_listening(address, process):
+    from multiprocessing.connection import Client
+    from utils.model_server import parse_address
+
+    deadline = time.monotonic() + READY_TIMEOUT
+    while time.monotonic() < deadline and process.is_alive():
+        try:
+            Client(parse_address(address), authkey=os.environ["MODEL_SERVER_AUTHKEY"].encode()).close()
+            return True
+        except (OSError, EOFError):
+            time.sleep(0.5)
+    return False
+
+
+def main():
+    context = multiprocessing.get_context("spawn")  # children never inherit torch or Mongo state
+    authkey = Config.MODEL_SERVER_AUTHKEY or secrets.token_hex(16)
+    addresses = model_server_addresses(Config.MODEL_WORKERS)
+    web_workers = Config.WEB_WORKERS
+    if web_workers > 1 and not hasattr(socket, "SO_REUSEPORT"):
+        logger.warning("SO_REUSEPORT is not available on this platform, running a single web worker")
+        web_workers = 1
+
+    # Spawned web workers read these through Config when they import it
+    os.environ["MODEL_SERVER_ADDRESSES"] = ",".join(addresses)
+    os.environ["MODEL_SERVER_AUTHKEY"] = authkey
+
+    specs = {}
+    for i, address in enumerate(addresses):
+        specs[f"model-{i}"] = (model_worker, (address, authkey.encode()))
+    for i in range(web_workers):
+        specs[f"web-{i}"] = (web_worker, (Config.HOST, Config.PORT, Config.WEB_THREADS))
+
+    children = {}
+
+    def start(name):
+        target, args = specs[name]
+        process = context.Process(target=target, args=args, name=name, daemon=False)
+        process.start()
+        children[name] = process
+        return process
+
+    def stop(*_):
+        for process in children.values():
+            if process.is_alive():
+                process.terminate()
+        for process in children.values():
+            process.join(timeout=10)
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for i, address in enumerate(addresses):
+        if not wait_until_listening(address, start(f"model-{i}")):
+            logger.error(f"Model server model-{i} did not come up")
+            stop()
+    for i in range(web_workers):
+        start(f"web-{i}")
+    logger.info(f"Serving on {Config.HOST}:{Config.PORT} with {web_workers} web and "
+                f"{len(addresses)} model workers")
+
+    while True:
+        time.sleep(1)
+        for name, process in list(children.items()):
+            if not process.is_alive():
+                logger.error(f"{name} exited with code {process.exitcode}, restarting")
+                start(name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import threading
+import time
+import pytest
+from utils.admission import AdmissionController, AdmissionRejected, BACKGROUND, INTERACTIVE
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.005)
+
+
+def acquire_in_thread(controller, priority, order):
+    def run():
+        controller.acquire(priority)
+        order.append(priority)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_interactive_rejected_straight_away_when_wait_queue_is_full():
+    controller = AdmissionController(max_concurrent=1, max_queue=0, queue_timeout=5)
+    controller.acquire()
+
+    started = time.monotonic()
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire(INTERACTIVE)
+    assert time.monotonic() - started < 0.5
+    assert rejected.value.retry_after >= 1
+    assert controller.stats()["rejected_queue_full"] == 1
+
+
+def test_interactive_rejected_after_queue_timeout():
+    controller = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=0.05)
+    controller.acquire()
+
+    with pytest.raises(AdmissionRejected):
+        controller.acquire(INTERACTIVE)
+    stats = controller.stats()
+    assert stats["rejected_timeout"] == 1
+    assert stats["queued_interactive"] == 0
+
+
+def test_free_slot_goes_to_interactive_before_earlier_background_waiter():
+    controller = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=5)
+    controller.acquire()
+    order = []
+    background = acquire_in_thread(controller, BACKGROUND, order)
+    wait_for(lambda: controller.stats()["queued_background"] == 1)
+    interactive = acquire_in_thread(controller, INTERACTIVE, order)
+    wait_for(lambda: controller.stats()["queued_interactive"] == 1)
+
+    controller.release()
+    interactive.join(2)
+    assert order == [INTERACTIVE]
+    controller.release()
+    background.join(2)
+    assert order == [INTERACTIVE, BACKGROUND]
+
+
+def test_background_callers_leave_room_for_interactive_ones():
+    controller = AdmissionController(max_concurrent=2, max_queue=4, queue_timeout=5, background_limit=1)
+    controller.acquire(BACKGROUND)
+    order = []
+    waiting = acquire_in_thread(controller, BACKGROUND, order)
+    wait_for(lambda: controller.stats()["queued_background"] == 1)
+
+    controller.acquire(INTERACTIVE)  # the second slot is still free for /ask
+    assert controller.stats()["in_flight"] == 2
+    assert order == []
+
+    controller.release()
+    controller.release()
+    waiting.join(2)
+    assert order == [BACKGROUND]
+
+
+def test_background_callers_wait_instead_of_being_rejected():
+    controller = AdmissionController(max_concurrent=1, max_queue=0, queue_timeout=0.01)
+    controller.acquire()
+    order = []
+    waiting = acquire_in_thread(controller, BACKGROUND, order)
+    time.sleep(0.05)
+    assert order == []
+
+    controller.release()
+    waiting.join(2)
+    assert order == [BACKGROUND]
+    assert controller.stats()["rejected_timeout"] == 0
+
+
+def test_slot_is_released_on_exit():
+    controller = AdmissionController(max_concurrent=1)
+    with controller.slot():
+        assert controller.stats()["in_flight"] == 1
+    assert controller.stats()["in_flight"] == 0
@@ -0,0 +1,80 @@
+from benchmarks.stand_ins import MemoryCollection
+from utils import answer_cache as answer_cache_module
+from utils.answer_cache import AnswerCache, normalize_question
+
+PARAMS = {"num_beams": 4, "max_length": 200}
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_normalize_question_ignores_case_whitespace_and_trailing_punctuation():
+    assert normalize_question("  What   is the Dataset?! ") == "what is the dataset"
+    assert normalize_question("what is the dataset") == "what is the dataset"
+
+
+def test_hit_for_equivalent_question_and_miss_for_other_params():
+    cache = AnswerCache(max_entries=10, ttl_seconds=60)
+    cache.put("doc-1", "What is the dataset?", PARAMS, "ImageNet")
+
+    assert cache.get("doc-1", "what is the   dataset", PARAMS) == "ImageNet"
+    assert cache.get("doc-1", "What is the dataset?", {**PARAMS, "num_beams": 1}) is None
+    assert cache.get("doc-2", "What is the dataset?", PARAMS) is None
+    assert cache.stats()["memory_hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(answer_cache_module.time, "time", clock)
+    cache = AnswerCache(max_entries=10, ttl_seconds=60)
+    cache.put("doc-1", "q", PARAMS, "answer")
+
+    clock.now += 59
+    assert cache.get("doc-1", "q", PARAMS) == "answer"
+    clock.now += 2
+    assert cache.get("doc-1", "q", PARAMS) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AnswerCache(max_entries=2, ttl_seconds=60)
+    cache.put("doc", "a", PARAMS, "A")
+    cache.put("doc", "b", PARAMS, "B")
+    assert cache.get("doc", "a", PARAMS) == "A"  # "b" is now the oldest
+    cache.put("doc", "c", PARAMS, "C")
+
+    assert cache.get("doc", "b", PARAMS) is None
+    assert cache.get("doc", "a", PARAMS) == "A"
+    assert cache.get("doc", "c", PARAMS) == "C"
+    assert cache.stats()["size"] == 2
+
+
+def test_invalidate_drops_only_that_documents_answers():
+    cache = AnswerCache(max_entries=10, ttl_seconds=60)
+    cache.put("doc-1", "q", PARAMS, "one")
+    cache.put("doc-2", "q", PARAMS, "two")
+    cache.invalidate(["doc-1"])
+
+    assert cache.get("doc-1", "q", PARAMS) is None
+    assert cache.get("doc-2", "q", PARAMS) == "two"
+    assert cache.stats()["invalidated"] == 1
+
+
+def test_mongo_tier_survives_a_new_process_until_invalidated():
+    collection = MemoryCollection("AnswerCache")
+    AnswerCache(ttl_seconds=60, mongo_collection=collection).put("doc-1", "q", PARAMS, "stored")
+
+    fresh = AnswerCache(ttl_seconds=60, mongo_collection=collection)
+    assert fresh.get("doc-1", "q", PARAMS) == "stored"
+    assert fresh.stats()["mongo_hits"] == 1
+    assert fresh.get("doc-1", "q", PARAMS) == "stored"
+    assert fresh.stats()["memory_hits"] == 1
+
+    fresh.invalidate(["doc-1"])
+    assert AnswerCache(mongo_collection=collection).get("doc-1", "q", PARAMS) is None
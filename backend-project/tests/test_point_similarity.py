@@ -0,0 +1,62 @@
+import difflib
+import numpy as np
+import pytest
+from utils import point_similarity
+
+POINTS = [
+    "The proposed method improves accuracy on the benchmark dataset",
+    "The sample size is small and limits generalization",
+    "The proposed method improves the accuracy on benchmark datasets",
+    "Evaluation uses a strong set of baselines",
+    "the  PROPOSED method improves accuracy on the benchmark dataset.",
+]
+
+
+def test_dedupe_keeps_the_first_of_each_near_duplicate_group_in_order():
+    assert point_similarity.dedupe(POINTS) == [POINTS[0], POINTS[1], POINTS[3]]
+
+
+def test_dedupe_keeps_unrelated_points_and_handles_short_lists():
+    unrelated = [POINTS[0], POINTS[1], POINTS[3]]
+    assert point_similarity.dedupe(unrelated) == unrelated
+    assert point_similarity.dedupe([POINTS[0]]) == [POINTS[0]]
+    assert point_similarity.dedupe([]) == []
+
+
+def test_near_duplicate_pairs_lists_each_pair_once():
+    pairs = point_similarity.near_duplicate_pairs(POINTS)
+    assert {(i, j) for i, j, _ in pairs} == {(0, 2), (0, 4), (2, 4)}
+    assert all(similarity > point_similarity.DIFFLIB_EQUIVALENT_THRESHOLD for _, _, similarity in pairs)
+
+
+def test_near_duplicate_pairs_does_not_depend_on_block_size():
+    rng = np.random.default_rng(0)
+    words = "model data results method accuracy baseline sample bias training evaluation".split()
+    points = [" ".join(rng.choice(words, 6)) for _ in range(40)]
+    full = point_similarity.near_duplicate_pairs(points)
+    blocked = point_similarity.near_duplicate_pairs(points, block_size=7)
+    assert [(i, j) for i, j, _ in blocked] == [(i, j) for i, j, _ in full]
+    assert [s for _, _, s in blocked] == pytest.approx([s for _, _, s in full])
+
+
+def test_threshold_mostly_agrees_with_difflib():
+    pairs = [(a, b) for i, a in enumerate(POINTS) for b in POINTS[i + 1:]]
+    similarity = {(a, b): float(point_similarity.cross_similarity([a], [b])[0, 0]) for a, b in pairs}
+    agree = sum(
+        (similarity[a, b] > point_similarity.DIFFLIB_EQUIVALENT_THRESHOLD)
+        == (difflib.SequenceMatcher(None, a.lower(), b.lower()).ratio() > 0.6)
+        for a, b in pairs
+    )
+    assert agree / len(pairs) >= 0.9
+
+
+def test_distinct_across_drops_points_shared_by_both_lists():
+    advantages = [POINTS[0], POINTS[3]]
+    limitations = [POINTS[2], POINTS[1]]
+    assert point_similarity.distinct_across(advantages, limitations) == ([POINTS[3]], [POINTS[1]])
+    assert point_similarity.distinct_across(advantages, []) == (advantages, [])
+
+
+def test_vectorize_rejects_dims_that_are_not_a_power_of_two():
+    with pytest.raises(ValueError):
+        point_similarity.vectorize(POINTS, dims=1000)
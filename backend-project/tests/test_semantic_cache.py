@@ -0,0 +1,78 @@
+import pytest
+from utils.semantic_cache import SemanticAnswerCache
+
+# Unit vectors, so cosine similarity to "dataset" is the first component
+VECTORS = {
+    "what dataset was used": [1.0, 0.0],
+    "which dataset did they use": [0.95, 0.31224989991991997],
+    "how was it evaluated": [0.8, 0.6],
+    "unnormalized paraphrase": [9.5, 3.1224989991991997],
+}
+
+
+def embed(texts):
+    return [VECTORS[text] for text in texts]
+
+
+def make_cache(**options):
+    return SemanticAnswerCache(embed, threshold=0.9, **options)
+
+
+def test_paraphrase_above_threshold_reuses_the_answer():
+    cache = make_cache()
+    cache.add("doc", "what dataset was used", "greedy", "ImageNet")
+
+    answer, similarity = cache.lookup("doc", "which dataset did they use", "greedy")
+    assert answer == "ImageNet"
+    assert similarity == pytest.approx(0.95, abs=1e-6)
+
+
+def test_question_below_threshold_misses():
+    cache = make_cache()
+    cache.add("doc", "what dataset was used", "greedy", "ImageNet")
+
+    assert cache.lookup("doc", "how was it evaluated", "greedy") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_embeddings_are_normalized_before_comparing():
+    cache = make_cache()
+    cache.add("doc", "what dataset was used", "greedy", "ImageNet")
+
+    answer, similarity = cache.lookup("doc", "unnormalized paraphrase", "greedy")
+    assert answer == "ImageNet"
+    assert similarity == pytest.approx(0.95, abs=1e-6)
+
+
+def test_best_match_wins():
+    cache = make_cache()
+    cache.add("doc", "how was it evaluated", "greedy", "Cross-validation")
+    cache.add("doc", "what dataset was used", "greedy", "ImageNet")
+
+    assert cache.lookup("doc", "which dataset did they use", "greedy")[0] == "ImageNet"
+
+
+def test_other_documents_and_params_do_not_match():
+    cache = make_cache()
+    cache.add("doc", "what dataset was used", "greedy", "ImageNet")
+
+    assert cache.lookup("other-doc", "what dataset was used", "greedy") is None
+    assert cache.lookup("doc", "what dataset was used", "beam") is None
+
+
+def test_questions_per_document_are_capped():
+    cache = make_cache(max_questions_per_doc=1)
+    cache.add("doc", "what dataset was used", "greedy", "ImageNet")
+    cache.add("doc", "how was it evaluated", "greedy", "Cross-validation")
+
+    assert cache.lookup("doc", "what dataset was used", "greedy") is None
+    assert cache.stats()["questions"] == 1
+
+
+def test_invalidate_forgets_the_document():
+    cache = make_cache()
+    cache.add("doc", "what dataset was used", "greedy", "ImageNet")
+    cache.invalidate(["doc"])
+
+    assert cache.lookup("doc", "what dataset was used", "greedy") is None
+    assert cache.stats()["documents"] == 0
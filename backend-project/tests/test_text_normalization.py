@@ -0,0 +1,67 @@
+import random
+import pytest
+from benchmarks.text_normalization import (
+    generated_points, generated_text, legacy_clean_and_improve_text, legacy_clean_text,
+    legacy_split_points, normalized, upload_text
+)
+from utils.text_normalization import MAX_CLEAN_CHARS, TextCleaner, clean_upload_text, polish_summary, split_points
+
+
+def fed_in_chunks(text, chunk_size, limit=MAX_CLEAN_CHARS):
+    cleaner = TextCleaner(limit)
+    for start in range(0, len(text), chunk_size):
+        if cleaner.feed(text[start:start + chunk_size]):
+            break
+    return cleaner.finish()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_clean_upload_text_matches_old_clean_text(seed):
+    text = upload_text(random.Random(seed), 20000)
+    # The old regex left a run of spaces where it removed a URL
+    assert normalized(clean_upload_text(text)) == normalized(legacy_clean_text(text))
+
+
+def test_clean_upload_text_matches_old_clean_text_exactly_without_urls():
+    text = "  Results\n\n were   significant\t(p < 0.05).  \r\n See Table 2 "
+    assert clean_upload_text(text) == legacy_clean_text(text)
+
+
+def test_urls_are_removed_even_when_glued_to_words():
+    text = "see https://doi.org/10.1000/x and www.example.com/page, or seehttp://a.b/c now"
+    assert clean_upload_text(text) == "see and or see now"
+    assert clean_upload_text(text) == normalized(legacy_clean_text(text))
+
+
+def test_long_text_is_cut_at_the_same_limit_as_before():
+    words = "model data analysis results method study".split()
+    rng = random.Random(0)
+    text = "  ".join(rng.choice(words) for _ in range(30000))
+    assert len(legacy_clean_text(text)) == MAX_CLEAN_CHARS
+    assert clean_upload_text(text) == legacy_clean_text(text)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 100, 4000])
+def test_feeding_in_chunks_matches_one_pass(chunk_size):
+    text = upload_text(random.Random(1), 10000)
+    assert fed_in_chunks(text, chunk_size) == clean_upload_text(text)
+
+
+def test_feed_reports_when_the_limit_is_reached():
+    cleaner = TextCleaner(limit=20)
+    assert cleaner.feed("short words ") is False
+    assert cleaner.feed("and then some more words ") is True
+    assert cleaner.feed("ignored ") is True
+    assert cleaner.finish() == "short words and then"
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_polish_summary_matches_old_clean_and_improve_text(seed):
+    text = generated_text(random.Random(seed), 60)
+    assert polish_summary(text) == legacy_clean_and_improve_text(text)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_split_points_matches_old_implementation(seed):
+    text = generated_points(random.Random(seed), 8)
+    assert split_points(text) == legacy_split_points(text)
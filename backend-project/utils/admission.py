@@ -0,0 +1,136 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from utils.instrumentation import metrics
+
+INTERACTIVE = 0  # /ask and other requests a user is waiting on
+BACKGROUND = 1  # summary jobs; queued behind interactive work
+
+
+class AdmissionRejected(Exception):
+    """No inference slot is available; retry after `retry_after` seconds"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounds the prompts queued for the model, with a priority wait queue in front.
+
+    BatchedGenerator takes a slot for every prompt it queues and gives it
+    back when the prompt goes into a batch, so `max_concurrent` (at least
+    the batch size) caps queued work without capping batch sizes. A stream
+    holds its slot until its generate() call has finished.
+
+    At most `max_concurrent` callers hold a slot. Interactive callers wait at
+    most `queue_timeout` seconds, and when `max_queue` of them are already
+    waiting they are rejected straight away. Background callers always wait,
+    hold at most `background_limit` slots between them, and a free slot goes
+    to the highest-priority waiter first, so a burst of /ask requests is not
+    stuck behind a long summary job.
+    """
+
+    def __init__(self, max_concurrent=2, max_queue=16, queue_timeout=10.0, background_limit=None):
+        self.max_concurrent = max_concurrent
+        self.background_limit = max_concurrent if background_limit is None else min(background_limit, max_concurrent)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._in_flight = 0
+        self._waiters = []  # heap of (priority, sequence)
+        self._sequence = itertools.count()
+        self._mean_hold = 1.0  # seconds, exponentially weighted
+        self._cond = threading.Condition()
+        self.counters = {"admitted": 0, "rejected_queue_full": 0, "rejected_timeout": 0}
+
+    @contextmanager
+    def slot(self, priority=INTERACTIVE):
+        self.acquire(priority)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    def acquire(self, priority=INTERACTIVE):
+        """Block until a slot is free; raises AdmissionRejected for interactive callers that cannot get one"""
+        interactive = priority == INTERACTIVE
+        enqueued = time.monotonic()
+        with self._cond:
+            # Only callers that would have to wait count against max_queue
+            must_wait = self._in_flight >= self.max_concurrent or self._queued(INTERACTIVE) > 0
+            if interactive and must_wait and self._queued(INTERACTIVE) >= self.max_queue:
+                self.counters["rejected_queue_full"] += 1
+                metrics.inc("admission_rejected_total", reason="queue_full")
+                raise AdmissionRejected("Inference queue is full", self._retry_after())
+
+            ticket = (priority, next(self._sequence))
+            heapq.heappush(self._waiters, ticket)
+            deadline = enqueued + self.queue_timeout if interactive else None
+            limit = self.max_concurrent if interactive else self.background_limit
+            while not (self._in_flight < limit and self._waiters[0] == ticket):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._waiters.remove(ticket)
+                    heapq.heapify(self._waiters)
+                    self._cond.notify_all()
+                    self.counters["rejected_timeout"] += 1
+                    metrics.inc("admission_rejected_total", reason="timeout")
+                    raise AdmissionRejected("Timed out waiting for an inference slot", self._retry_after())
+                self._cond.wait(remaining)
+
+            heapq.heappop(self._waiters)
+            self._in_flight += 1
+            self.counters["admitted"] += 1
+            # The next waiter may also fit if several slots are free
+            self._cond.notify_all()
+        metrics.observe("admission_wait_seconds", time.monotonic() - enqueued,
+                        priority="interactive" if interactive else "background")
+
+    def release(self, held_seconds=None):
+        with self._cond:
+            self._in_flight -= 1
+            if held_seconds is not None:
+                self._mean_hold = 0.9 * self._mean_hold + 0.1 * held_seconds
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                **self.counters,
+                "in_flight": self._in_flight,
+                "max_concurrent": self.max_concurrent,
+                "background_limit": self.background_limit,
+                "queued_interactive": self._queued(INTERACTIVE),
+                "queued_background": len(self._waiters) - self._queued(INTERACTIVE),
+                "max_queue": self.max_queue,
+                "mean_hold_s": round(self._mean_hold, 3)
+            }
+
+    def _queued(self, priority):
+        return sum(1 for waiter in self._waiters if waiter[0] == priority)
+
+    def _retry_after(self):
+        """Seconds until the current queue has likely drained; called with the condition held"""
+        rounds = (len(self._waiters) + self._in_flight) / self.max_concurrent
+        return max(1, math.ceil(rounds * self._mean_hold))
+
+
+class PrioritizedGenerator:
+    """Generator wrapper that submits every call at a fixed priority"""
+
+    def __init__(self, generator, priority):
+        self.generator = generator
+        self.priority = priority
+
+    def generate(self, *args, **kwargs):
+        return self.generator.generate(*args, **kwargs, priority=self.priority)
+
+    def generate_many(self, *args, **kwargs):
+        return self.generator.generate_many(*args, **kwargs, priority=self.priority)
+
+    def submit_many(self, *args, **kwargs):
+        return self.generator.submit_many(*args, **kwargs, priority=self.priority)
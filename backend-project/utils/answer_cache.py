@@ -0,0 +1,121 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+_WHITESPACE = re.compile(r'\s+')
+_TRAILING_PUNCTUATION = re.compile(r'[\s?.!]+$')
+
+
+def normalize_question(question):
+    """Case- and whitespace-insensitive form of a question, without trailing ?/./!"""
+    return _TRAILING_PUNCTUATION.sub('', _WHITESPACE.sub(' ', question.strip().lower()))
+
+
+class AnswerCache:
+    """Two-tier cache of /ask answers.
+
+    Tier one is an in-process LRU with a TTL; the optional second tier is a
+    Mongo collection (with a TTL index) so answers survive restarts and are
+    shared between workers. Entries are keyed on the document's content id,
+    the normalized question and the generation parameters.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=86400, mongo_collection=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.mongo_collection = mongo_collection
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._indexes_ready = False
+        self.counters = {"memory_hits": 0, "mongo_hits": 0, "misses": 0, "invalidated": 0}
+
+    @staticmethod
+    def make_key(content_id, question, params):
+        payload = json.dumps([content_id, normalize_question(question), params], sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, content_id, question, params):
+        key = self.make_key(content_id, question, params)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return entry[1]
+            if entry:
+                del self._entries[key]
+
+        if self.mongo_collection is not None:
+            stored = self.mongo_collection.find_one(
+                {"key": key, "expires_at": {"$gt": datetime.utcnow()}},
+                {"answer": 1, "expires_at": 1, "_id": 0}
+            )
+            if stored:
+                remaining = (stored["expires_at"] - datetime.utcnow()).total_seconds()
+                self._remember(key, content_id, stored["answer"], now + remaining)
+                with self._lock:
+                    self.counters["mongo_hits"] += 1
+                return stored["answer"]
+
+        with self._lock:
+            self.counters["misses"] += 1
+        return None
+
+    def put(self, content_id, question, params, answer):
+        key = self.make_key(content_id, question, params)
+        self._remember(key, content_id, answer, time.time() + self.ttl_seconds)
+        if self.mongo_collection is not None:
+            self._ensure_indexes()
+            self.mongo_collection.update_one(
+                {"key": key},
+                {"$set": {
+                    "key": key,
+                    "content_id": content_id,
+                    "answer": answer,
+                    "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl_seconds)
+                }},
+                upsert=True
+            )
+
+    def invalidate(self, content_ids):
+        content_ids = set(content_ids)
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry[2] in content_ids]
+            for key in stale:
+                del self._entries[key]
+            self.counters["invalidated"] += len(stale)
+        if self.mongo_collection is not None and content_ids:
+            self.mongo_collection.delete_many({"content_id": {"$in": list(content_ids)}})
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+            size = len(self._entries)
+        lookups = counters["memory_hits"] + counters["mongo_hits"] + counters["misses"]
+        hits = counters["memory_hits"] + counters["mongo_hits"]
+        return {
+            **counters,
+            "size": size,
+            "max_entries": self.max_entries,
+            "hit_rate": hits / lookups if lookups else 0.0
+        }
+
+    def _remember(self, key, content_id, answer, expires_at):
+        with self._lock:
+            self._entries[key] = (expires_at, answer, content_id)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _ensure_indexes(self):
+        if not self._indexes_ready:
+            self.mongo_collection.create_index("key", unique=True)
+            self.mongo_collection.create_index("content_id")
+            # Mongo removes entries on its own once expires_at has passed
+            self.mongo_collection.create_index("expires_at", expireAfterSeconds=0)
+            self._indexes_ready = True
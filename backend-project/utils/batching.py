@@ -0,0 +1,253 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+import torch
+from utils.admission import INTERACTIVE
+from utils.metrics import Histogram
+from utils.instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32]
+QUEUE_WAIT_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 1000]
+
+
+class _Request:
+    __slots__ = ("prompt", "future", "enqueued_at")
+
+    def __init__(self, prompt):
+        self.prompt = prompt
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class BatchedGenerator:
+    """Micro-batching front end for a seq2seq model's generate().
+
+    Prompts submitted with identical generation settings are collected for up
+    to `max_wait_ms` (or until `max_batch_size` are waiting), tokenized
+    together with padding and run as a single generate() call. Callers block
+    until their own output has been decoded. Lower `priority` values are
+    served first (0 = interactive, 1 = background jobs), and interactive
+    prompts have a worker of their own, so they never wait for a long
+    background batch that is already running.
+
+    With an AdmissionController, each queued prompt holds one of its slots
+    until a worker takes it into a batch, and each stream holds one until its
+    generate() call finishes. Submitting blocks (or, for interactive callers,
+    raises AdmissionRejected) while the queue is full.
+
+    At most `max_generations` model.generate() calls run at once, batches and
+    streams together.
+    """
+
+    def __init__(self, model, tokenizer, device, max_batch_size=8, max_wait_ms=20, admission=None,
+                 max_generations=2):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.device = device
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        if admission is not None and admission.background_limit < max_batch_size:
+            raise ValueError("INFERENCE_MAX_CONCURRENT must be at least BATCH_MAX_SIZE")
+        self.admission = admission
+        self.max_generations = max_generations
+        self._generation_slots = threading.BoundedSemaphore(max_generations)
+        self._generating = 0
+        self.batch_size_histogram = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_histogram = Histogram(QUEUE_WAIT_BUCKETS_MS)
+        self._pending = {}  # generation settings key -> [_Request]
+        self._cond = threading.Condition()
+        self._workers = [
+            threading.Thread(target=self._run, args=(None,), name="batched-generator", daemon=True),
+            threading.Thread(target=self._run, args=(INTERACTIVE,), name="batched-generator-interactive", daemon=True)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def generate(self, prompt, max_input_length=512, **generate_kwargs):
+        """Generate text for a single prompt, sharing a model call with concurrent callers"""
+        return self.submit(prompt, max_input_length, **generate_kwargs).result()
+
+    def generate_many(self, prompts, max_input_length=512, **generate_kwargs):
+        """Generate text for several prompts with the same settings, in input order.
+
+        The prompts are queued together, so up to `max_batch_size` of them are
+        tokenized and decoded as one padded batch.
+        """
+        futures = self.submit_many(prompts, max_input_length, **generate_kwargs)
+        return [future.result() for future in futures]
+
+    def submit(self, prompt, max_input_length=512, **generate_kwargs):
+        """Queue a prompt and return a Future resolving to the decoded output"""
+        return self.submit_many([prompt], max_input_length, **generate_kwargs)[0]
+
+    def submit_many(self, prompts, max_input_length=512, priority=0, **generate_kwargs):
+        """Queue several prompts and return one Future per prompt"""
+        key = (priority, max_input_length, tuple(sorted(generate_kwargs.items())))
+        if self.admission is None:
+            requests = [_Request(prompt) for prompt in prompts]
+            with self._cond:
+                self._pending.setdefault(key, []).extend(requests)
+                self._cond.notify_all()
+            return [request.future for request in requests]
+
+        # One slot per queued prompt; queue each as soon as it has one, since
+        # slots only come back when earlier prompts are taken into a batch
+        futures = []
+        for prompt in prompts:
+            self.admission.acquire(priority)
+            request = _Request(prompt)
+            with self._cond:
+                self._pending.setdefault(key, []).append(request)
+                self._cond.notify_all()
+            futures.append(request.future)
+        return futures
+
+    def stream(self, prompt, max_input_length=512, timeout=120, priority=0, **generate_kwargs):
+        """Iterator of decoded text pieces, produced while a single prompt is generated.
+
+        Streaming cannot share a padded batch, so this runs its own generate()
+        call. It is admitted (or rejected) and started before this returns, and
+        keeps its admission slot until generate() finishes, even if the
+        iterator is abandoned. The iterator raises queue.Empty if no piece
+        arrives within `timeout` seconds.
+        """
+        from transformers import TextIteratorStreamer
+        if self.admission is not None:
+            self.admission.acquire(priority)
+        admitted = time.monotonic()
+        try:
+            streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True, timeout=timeout)
+            inputs = self.tokenizer(prompt, return_tensors="pt", max_length=max_input_length, truncation=True).to(self.device)
+        except BaseException:
+            if self.admission is not None:
+                self.admission.release()
+            raise
+        failures = []
+
+        def run_generate():
+            try:
+                with self._generation_slot(), torch.no_grad():
+                    self.model.generate(
+                        input_ids=inputs.input_ids,
+                        attention_mask=inputs.attention_mask,
+                        streamer=streamer,
+                        **generate_kwargs
+                    )
+            except Exception as e:
+                failures.append(e)
+                streamer.end()
+            finally:
+                if self.admission is not None:
+                    self.admission.release(time.monotonic() - admitted)
+
+        threading.Thread(target=run_generate, name="stream-generate", daemon=True).start()
+        return self._stream(streamer, failures)
+
+    def _stream(self, streamer, failures):
+        for piece in streamer:
+            if piece:
+                yield piece
+        if failures:
+            raise failures[0]
+
+    def stats(self):
+        with self._cond:
+            queued = sum(len(requests) for requests in self._pending.values())
+        stats = {
+            "queued": queued,
+            "generating": self._generating,
+            "max_generations": self.max_generations,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batch_size": self.batch_size_histogram.snapshot(),
+            "queue_wait_ms": self.queue_wait_histogram.snapshot()
+        }
+        if self.admission is not None:
+            stats["admission"] = self.admission.stats()
+        return stats
+
+    @contextmanager
+    def _generation_slot(self):
+        """Hold one of the `max_generations` permits for a model.generate() call"""
+        with self._generation_slots:
+            with self._cond:
+                self._generating += 1
+            try:
+                yield
+            finally:
+                with self._cond:
+                    self._generating -= 1
+
+    def _next_batch(self, max_priority):
+        """Block until a batch at or above max_priority (None = any) is ready; call with the condition held"""
+        while True:
+            eligible = [k for k in self._pending if max_priority is None or k[0] <= max_priority]
+            while not eligible:
+                self._cond.wait()
+                eligible = [k for k in self._pending if max_priority is None or k[0] <= max_priority]
+
+            # Serve the most urgent group, oldest request first within a priority
+            key = min(eligible, key=lambda k: (k[0], self._pending[k][0].enqueued_at))
+            requests = self._pending[key]
+            deadline = requests[0].enqueued_at + self.max_wait
+            remaining = deadline - time.monotonic()
+            if len(requests) >= self.max_batch_size or remaining <= 0:
+                batch = requests[:self.max_batch_size]
+                if len(requests) > self.max_batch_size:
+                    self._pending[key] = requests[self.max_batch_size:]
+                else:
+                    del self._pending[key]
+                return key, batch
+            self._cond.wait(remaining)
+
+    def _run(self, max_priority):
+        while True:
+            with self._cond:
+                key, batch = self._next_batch(max_priority)
+            if self.admission is not None:
+                taken = time.monotonic()
+                for request in batch:
+                    self.admission.release(taken - request.enqueued_at)
+            try:
+                self._run_batch(key, batch)
+            except Exception as e:
+                logger.error(f"Batched generation failed: {str(e)}")
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+
+    def _run_batch(self, key, batch):
+        _, max_input_length, generate_items = key
+        started = time.monotonic()
+        for request in batch:
+            self.queue_wait_histogram.observe((started - request.enqueued_at) * 1000)
+        self.batch_size_histogram.observe(len(batch))
+
+        inputs = self.tokenizer(
+            [request.prompt for request in batch],
+            return_tensors="pt",
+            max_length=max_input_length,
+            truncation=True,
+            padding=True
+        ).to(self.device)
+
+        with self._generation_slot(), torch.no_grad():
+            output_ids = self.model.generate(
+                input_ids=inputs.input_ids,
+                attention_mask=inputs.attention_mask,
+                **dict(generate_items)
+            )
+
+        if metrics.enabled:
+            metrics.inc("generate_calls_total")
+            metrics.inc("generate_tokens_total", int(inputs.attention_mask.sum()), direction="in")
+            metrics.inc("generate_tokens_total", int((output_ids != self.tokenizer.pad_token_id).sum()), direction="out")
+            metrics.observe("stage_duration_seconds", time.monotonic() - started, stage="model_generate")
+
+        outputs = self.tokenizer.batch_decode(output_ids, skip_special_tokens=True)
+        for request, output in zip(batch, outputs):
+            request.future.set_result(output)
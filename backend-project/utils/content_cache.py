@@ -0,0 +1,57 @@
+import hashlib
+from datetime import datetime
+from config import Config
+
+
+def summary_version():
+    """Identifies the model, prompts and summarization path a cached summary was produced with"""
+    key = f"{Config.LLM_MODEL}|{Config.PROMPT_VERSION}|{Config.SUMMARY_MODE}|{Config.INFERENCE_BACKEND}"
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+class ContentCache:
+    """Content-addressed cache of extracted documents and their summaries.
+
+    One Mongo document per unique file (keyed by the SHA-256 of its bytes)
+    records the Chroma content_id holding the extracted text and, per
+    summary_version(), the finished summary/advantages/disadvantages.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def lookup(self, file_hash):
+        return self.collection.find_one({"file_hash": file_hash}, {"_id": 0})
+
+    def register(self, file_hash, content_id, filename):
+        self.collection.update_one(
+            {"file_hash": file_hash},
+            {"$setOnInsert": {
+                "file_hash": file_hash,
+                "content_id": content_id,
+                "filename": filename,
+                "created": datetime.utcnow()
+            }},
+            upsert=True
+        )
+
+    def get_summary(self, file_hash):
+        entry = self.collection.find_one(
+            {"file_hash": file_hash},
+            {f"summaries.{summary_version()}": 1, "_id": 0}
+        )
+        return (entry or {}).get("summaries", {}).get(summary_version())
+
+    def store_summary(self, file_hash, summary, advantages, disadvantages):
+        self.collection.update_one(
+            {"file_hash": file_hash},
+            {"$set": {f"summaries.{summary_version()}": {
+                "summary": summary,
+                "advantages": advantages,
+                "disadvantages": disadvantages,
+                "created": datetime.utcnow()
+            }}}
+        )
+
+    def forget(self, content_ids):
+        self.collection.delete_many({"content_id": {"$in": list(content_ids)}})
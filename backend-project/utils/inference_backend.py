@@ -0,0 +1,54 @@
+import logging
+import torch
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("fp32", "int8", "bf16")
+
+
+def configure_threads(intra_op=Config.TORCH_INTRA_OP_THREADS, inter_op=Config.TORCH_INTER_OP_THREADS):
+    """Apply torch thread counts; 0 keeps torch's default. Must run before the first forward pass."""
+    if intra_op:
+        torch.set_num_threads(intra_op)
+    if inter_op:
+        try:
+            torch.set_num_interop_threads(inter_op)
+        except RuntimeError as e:
+            # Only allowed once, before any inter-op parallel work has started
+            logger.warning(f"Could not set inter-op threads: {str(e)}")
+
+
+def bf16_supported(device):
+    if device.type == "cuda":
+        return torch.cuda.is_bf16_supported()
+    try:
+        torch.ones(2, 2, dtype=torch.bfloat16) @ torch.ones(2, 2, dtype=torch.bfloat16)
+        return True
+    except RuntimeError:
+        return False
+
+
+def prepare_model(model, backend, device):
+    """Convert a loaded fp32 model for the requested inference backend.
+
+    int8 dynamically quantizes the Linear layers (CPU only); bf16 casts the
+    weights where the device supports it. Unsupported combinations fall back
+    to fp32 with a warning so the app still starts.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown INFERENCE_BACKEND '{backend}', expected one of {BACKENDS}")
+
+    if backend == "int8":
+        if device.type != "cpu":
+            logger.warning("int8 dynamic quantization is CPU-only, using fp32")
+            return model
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    if backend == "bf16":
+        if not bf16_supported(device):
+            logger.warning(f"bfloat16 is not supported on {device}, using fp32")
+            return model
+        return model.to(torch.bfloat16)
+
+    return model
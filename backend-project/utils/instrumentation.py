@@ -0,0 +1,120 @@
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from config import Config
+from utils.metrics import Histogram
+
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300]
+
+_DISABLED = nullcontext()
+
+
+class MetricsRegistry:
+    """Labelled counters and latency histograms rendered in Prometheus text format.
+
+    When disabled every call returns straight away (timer() hands back a
+    shared no-op context manager), so instrumented code pays one attribute
+    check per call.
+    """
+
+    def __init__(self, enabled=True, prefix="researchai"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self._families = {}  # name -> (type, help)
+        self._histograms = {}  # (name, labels) -> Histogram
+        self._counters = {}  # (name, labels) -> float
+        self._gauges = {}  # (name, labels) -> callable sampled at render time
+        self._lock = threading.Lock()
+
+    def describe(self, name, kind, help_text):
+        self._families[name] = (kind, help_text)
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(buckets))
+        histogram.observe(value)
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def gauge(self, name, read, **labels):
+        """Report read() as the current value of `name` whenever metrics are rendered"""
+        self._gauges[(name, tuple(sorted(labels.items())))] = read
+
+    def timer(self, name, **labels):
+        """Context manager observing its wall-clock duration in seconds"""
+        if not self.enabled:
+            return _DISABLED
+        return self._timer(name, labels)
+
+    @contextmanager
+    def _timer(self, name, labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items(), key=lambda item: item[0])
+
+        samples = {}
+        for (name, labels), read in gauges:
+            samples.setdefault(name, []).append(f"{self.prefix}_{name}{_labels(labels)} {read()}")
+        for (name, labels), value in counters:
+            samples.setdefault(name, []).append(f"{self.prefix}_{name}{_labels(labels)} {value}")
+        for (name, labels), histogram in histograms:
+            snapshot = histogram.snapshot()
+            lines = samples.setdefault(name, [])
+            for bound, count in snapshot["buckets"].items():
+                lines.append(f"{self.prefix}_{name}_bucket{_labels(labels + (('le', bound),))} {count}")
+            lines.append(f"{self.prefix}_{name}_sum{_labels(labels)} {snapshot['sum']}")
+            lines.append(f"{self.prefix}_{name}_count{_labels(labels)} {snapshot['count']}")
+
+        output = []
+        for name in sorted(samples):
+            kind, help_text = self._families.get(name, ("untyped", ""))
+            output.append(f"# HELP {self.prefix}_{name} {help_text}")
+            output.append(f"# TYPE {self.prefix}_{name} {kind}")
+            output.extend(samples[name])
+        return "\n".join(output) + "\n"
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+metrics = MetricsRegistry(enabled=Config.METRICS_ENABLED)
+metrics.describe("http_request_duration_seconds", "histogram", "Time to produce a response, per endpoint")
+metrics.describe("http_requests_total", "counter", "Responses sent, per endpoint and status code")
+metrics.describe("stage_duration_seconds", "histogram", "Time spent in each processing stage")
+metrics.describe("generate_calls_total", "counter", "Batched model.generate calls")
+metrics.describe("generate_tokens_total", "counter", "Tokens fed to (in) and produced by (out) the model")
+metrics.describe("admission_wait_seconds", "histogram", "Time spent waiting for an inference slot")
+metrics.describe("admission_rejected_total", "counter", "Generations refused because no slot was available")
+metrics.describe("inference_in_flight", "gauge", "Prompts queued for the model or streaming (each holds an inference slot)")
+metrics.describe("inference_queue_depth", "gauge", "Callers waiting for an inference slot")
+
+
+def stage_timer(stage):
+    """Time a named processing stage, e.g. `with stage_timer("chroma_get"):`"""
+    return metrics.timer("stage_duration_seconds", stage=stage)
@@ -0,0 +1,74 @@
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue already holds its maximum number of jobs"""
+
+
+class JobQueue:
+    """Bounded worker pool for long-running jobs such as summary generation.
+
+    At most `max_workers` jobs run at once and at most `max_pending` jobs
+    (running + waiting) are accepted; further submissions raise QueueFullError.
+    """
+
+    def __init__(self, max_workers=1, max_pending=16, max_history=1000):
+        # Threads, not processes: jobs share this process's model, Mongo client and progress broker
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="summary-job")
+        self._max_pending = max_pending
+        self._max_history = max_history
+        self._jobs = {}
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, key=None, job_id=None):
+        """Queue fn(*args) and return its job id (`job_id` if given, else a new one).
+
+        If `key` is given and a job with the same key is still pending, the
+        existing job id is returned instead of queuing a duplicate.
+        """
+        with self._lock:
+            if key is not None and key in self._keys:
+                return self._keys[key]
+            pending = sum(1 for future in self._jobs.values() if not future.done())
+            if pending >= self._max_pending:
+                raise QueueFullError("Job queue is full, try again later")
+
+            if len(self._jobs) >= self._max_history:
+                # Forget finished jobs so the registry does not grow forever
+                self._jobs = {jid: f for jid, f in self._jobs.items() if not f.done()}
+
+            job_id = job_id or str(uuid.uuid4())
+            future = self._executor.submit(fn, *args)
+            self._jobs[job_id] = future
+            if key is not None:
+                self._keys[key] = job_id
+        future.add_done_callback(lambda f: self._finish(job_id, key, f))
+        return job_id
+
+    def _finish(self, job_id, key, future):
+        with self._lock:
+            if key is not None and self._keys.get(key) == job_id:
+                del self._keys[key]
+        if future.exception():
+            logger.error(f"Job {job_id} failed: {future.exception()}")
+
+    def status(self, job_id):
+        """Return 'queued', 'running', 'completed', 'failed' or None for unknown jobs"""
+        with self._lock:
+            future = self._jobs.get(job_id)
+        if future is None:
+            return None
+        if future.running():
+            return "running"
+        if not future.done():
+            return "queued"
+        return "failed" if future.exception() else "completed"
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
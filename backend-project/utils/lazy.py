@@ -0,0 +1,69 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class LazyResource:
+    """Thread-safe holder that runs an expensive loader once, on first use.
+
+    Concurrent callers block on the same load; a failed load is reported by
+    status() and retried on the next get().
+    """
+
+    def __init__(self, name, loader):
+        self.name = name
+        self._loader = loader
+        self._value = None
+        self._state = "cold"
+        self._error = None
+        self._load_seconds = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self._state == "ready"
+
+    def get(self):
+        if self._state == "ready":
+            return self._value
+        with self._lock:
+            if self._state != "ready":
+                self._state = "loading"
+                started = time.monotonic()
+                try:
+                    self._value = self._loader()
+                except Exception as e:
+                    self._state, self._error = "failed", str(e)
+                    logger.error(f"Loading {self.name} failed: {str(e)}")
+                    raise
+                self._load_seconds = round(time.monotonic() - started, 3)
+                self._state, self._error = "ready", None
+                logger.info(f"Loaded {self.name} in {self._load_seconds}s")
+        return self._value
+
+    def status(self):
+        return {"state": self._state, "load_seconds": self._load_seconds, "error": self._error}
+
+
+class LazyProxy:
+    """Stands in for a lazily loaded object (or one attribute of it).
+
+    Attribute access and calls are forwarded, so module-level names such as
+    `model` or `collection` keep working without loading anything at import.
+    """
+
+    def __init__(self, resource, attribute=None):
+        self._resource = resource
+        self._attribute = attribute
+
+    def _target(self):
+        value = self._resource.get()
+        return getattr(value, self._attribute) if self._attribute else value
+
+    def __getattr__(self, name):
+        return getattr(self._target(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._target()(*args, **kwargs)
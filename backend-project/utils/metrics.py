@@ -0,0 +1,34 @@
+import bisect
+import threading
+
+
+class Histogram:
+    """Thread-safe fixed-bucket histogram (cumulative counts, Prometheus style)"""
+
+    def __init__(self, buckets):
+        self.buckets = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self):
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative, running = {}, 0
+        for bound, bucket_count in zip(self.buckets + [float("inf")], counts):
+            running += bucket_count
+            cumulative["+Inf" if bound == float("inf") else str(bound)] = running
+        return {
+            "buckets": cumulative,
+            "count": count,
+            "sum": total,
+            "mean": total / count if count else 0.0
+        }
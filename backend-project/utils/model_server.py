@@ -0,0 +1,296 @@
+"""Dedicated model processes and the client web workers use to reach them.
+
+A model server loads FLAN-T5 once and answers generate requests from any
+number of web workers over a Unix socket, or localhost TCP where Unix
+sockets are unavailable (multiprocessing.connection, so messages are
+pickled and every connection must present the auth key). Requests
+arriving on different connections meet in the server's BatchedGenerator and
+share padded batches exactly as in-process callers do. Admission control
+runs in the server too, so its limits hold across all web workers.
+"""
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from multiprocessing.connection import Client, Listener
+from types import SimpleNamespace
+from config import Config
+from utils.admission import AdmissionController, AdmissionRejected
+
+logger = logging.getLogger(__name__)
+
+
+def load_local_model(admission=None):
+    """Load tokenizer and model into this process behind a BatchedGenerator"""
+    import torch
+    from transformers import T5Tokenizer, T5ForConditionalGeneration
+    from utils.batching import BatchedGenerator
+    from utils.inference_backend import configure_threads, prepare_model
+
+    configure_threads()
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    tokenizer = T5Tokenizer.from_pretrained(Config.LLM_MODEL)
+    model = T5ForConditionalGeneration.from_pretrained(Config.LLM_MODEL).to(device)
+    model = prepare_model(model, Config.INFERENCE_BACKEND, device)
+    model.eval()
+    torch.set_grad_enabled(False)
+    # Concurrent generate calls with matching settings share one padded batch
+    generator = BatchedGenerator(
+        model, tokenizer, device,
+        max_batch_size=Config.BATCH_MAX_SIZE,
+        max_wait_ms=Config.BATCH_MAX_WAIT_MS,
+        admission=admission,
+        max_generations=Config.INFERENCE_MAX_GENERATIONS
+    )
+    return SimpleNamespace(device=device, tokenizer=tokenizer, model=model, generator=generator)
+
+
+def parse_address(address):
+    """"host:port" becomes a TCP address, anything else is a Unix socket path"""
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit():
+        return host, int(port)
+    return address
+
+
+def run_model_server(address, authkey):
+    """Serve generate requests on `address` until the process is killed"""
+    logging.basicConfig(level=logging.INFO)
+    admission = AdmissionController(
+        max_concurrent=Config.INFERENCE_MAX_CONCURRENT,
+        max_queue=Config.INFERENCE_MAX_QUEUE,
+        queue_timeout=Config.INFERENCE_QUEUE_TIMEOUT,
+        background_limit=Config.BATCH_MAX_SIZE
+    )
+    generator = load_local_model(admission).generator
+    address = parse_address(address)
+    if isinstance(address, str) and os.path.exists(address):
+        os.remove(address)
+    with Listener(address, authkey=authkey) as listener:
+        logger.info(f"Model server {os.getpid()} listening on {address}")
+        while True:
+            try:
+                connection = listener.accept()
+            except Exception as e:
+                logger.error(f"Model server accept failed: {str(e)}")
+                continue
+            threading.Thread(target=_serve_connection, args=(connection, generator), daemon=True).start()
+
+
+def _serve_connection(connection, generator):
+    with connection:
+        while True:
+            try:
+                op, payload = connection.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                if op == "generate_many":
+                    prompts, max_input_length, generate_kwargs = payload
+                    connection.send(("ok", generator.generate_many(prompts, max_input_length, **generate_kwargs)))
+                elif op == "stream":
+                    prompt, max_input_length, timeout, generate_kwargs = payload
+                    pieces = generator.stream(prompt, max_input_length, timeout=timeout, **generate_kwargs)
+                    connection.send(("started", None))
+                    for piece in pieces:
+                        connection.send(("token", piece))
+                    connection.send(("done", None))
+                elif op == "stats":
+                    connection.send(("ok", generator.stats()))
+                else:
+                    connection.send(("error", f"Unknown operation {op}"))
+            except (EOFError, OSError):
+                return
+            except AdmissionRejected as e:
+                connection.send(("rejected", (str(e), e.retry_after)))
+            except Exception as e:
+                logger.error(f"Model server {op} failed: {str(e)}")
+                connection.send(("error", str(e)))
+
+
+class RemoteGenerator:
+    """BatchedGenerator-compatible client for one or more model servers.
+
+    Calls go to the server with the fewest requests in flight. Connections
+    are pooled per server; submit_many splits its prompts into batch-sized
+    groups so a long map step is spread over all model workers.
+    """
+
+    def __init__(self, addresses, authkey, max_batch_size=8):
+        self.addresses = [parse_address(address) for address in addresses]
+        self.authkey = authkey
+        self.max_batch_size = max_batch_size
+        self._idle = {address: queue.LifoQueue() for address in self.addresses}
+        self._in_flight = {address: 0 for address in self.addresses}
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self._admission_cache = None  # (monotonic time, admission_stats())
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(4, len(self.addresses) * 4), thread_name_prefix="remote-generate"
+        )
+
+    def generate(self, prompt, max_input_length=512, **generate_kwargs):
+        return self.generate_many([prompt], max_input_length, **generate_kwargs)[0]
+
+    def generate_many(self, prompts, max_input_length=512, **generate_kwargs):
+        return self._call("generate_many", (list(prompts), max_input_length, generate_kwargs))
+
+    def submit(self, prompt, max_input_length=512, **generate_kwargs):
+        return self.submit_many([prompt], max_input_length, **generate_kwargs)[0]
+
+    def submit_many(self, prompts, max_input_length=512, **generate_kwargs):
+        """Queue prompts and return one Future per prompt"""
+        futures = [Future() for _ in prompts]
+        for start in range(0, len(prompts), self.max_batch_size):
+            group = futures[start:start + self.max_batch_size]
+            remote = self._executor.submit(
+                self.generate_many, prompts[start:start + self.max_batch_size], max_input_length, **generate_kwargs
+            )
+            remote.add_done_callback(lambda done, group=group: _resolve(group, done))
+        return futures
+
+    def stream(self, prompt, max_input_length=512, timeout=120, **generate_kwargs):
+        """Iterator of decoded pieces as the model server produces them; raises queue.Empty on timeout.
+
+        Like BatchedGenerator.stream, admission happens before this returns.
+        """
+        address, connection = self._checkout()
+        try:
+            connection.send(("stream", (prompt, max_input_length, timeout, generate_kwargs)))
+            if not connection.poll(timeout):
+                raise queue.Empty
+            kind, value = connection.recv()
+        except BaseException:
+            self._checkin(address, connection, reuse=False)
+            raise
+        if kind != "started":
+            self._checkin(address, connection)
+            _raise_reply(kind, value)
+        return self._read_stream(address, connection, timeout)
+
+    def _read_stream(self, address, connection, timeout):
+        finished = False
+        try:
+            while True:
+                if not connection.poll(timeout):
+                    raise queue.Empty
+                kind, value = connection.recv()
+                if kind == "token":
+                    yield value
+                elif kind == "done":
+                    finished = True
+                    return
+                else:
+                    finished = True
+                    _raise_reply(kind, value)
+        finally:
+            # A stream abandoned half way still has messages in flight; never reuse it
+            self._checkin(address, connection, reuse=finished)
+
+    def stats(self):
+        servers = []
+        for address in self.addresses:
+            try:
+                servers.append({"address": str(address), **self._call("stats", None, address=address)})
+            except Exception as e:
+                servers.append({"address": str(address), "error": str(e)})
+        with self._lock:
+            in_flight = {str(address): count for address, count in self._in_flight.items()}
+        return {"model_servers": servers, "in_flight": in_flight}
+
+    def admission_stats(self, max_age=1.0):
+        """The model servers' admission stats, summed; cached for `max_age` seconds (one /metrics scrape)"""
+        with self._lock:
+            cached = self._admission_cache
+            if cached is not None and time.monotonic() - cached[0] < max_age:
+                return cached[1]
+        totals = {"model_servers": 0, "unreachable": 0}
+        for address in self.addresses:
+            try:
+                stats = self._call("stats", None, address=address).get("admission")
+            except Exception:
+                totals["unreachable"] += 1
+                continue
+            if stats:
+                totals["model_servers"] += 1
+                for key, value in stats.items():
+                    if isinstance(value, int):
+                        totals[key] = totals.get(key, 0) + value
+        with self._lock:
+            self._admission_cache = (time.monotonic(), totals)
+        return totals
+
+    def _call(self, op, payload, address=None, retry=True):
+        chosen, connection = self._checkout(address)
+        reusable = False
+        try:
+            connection.send((op, payload))
+            kind, value = connection.recv()
+            reusable = True
+        except (EOFError, OSError):
+            if not retry:
+                raise
+            # The server restarted: its pooled connections are all dead
+            self._drop_idle(chosen)
+            return self._call(op, payload, address, retry=False)
+        finally:
+            self._checkin(chosen, connection, reuse=reusable)
+        if kind != "ok":
+            _raise_reply(kind, value)
+        return value
+
+    def _drop_idle(self, address):
+        while True:
+            try:
+                self._idle[address].get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _checkout(self, address=None):
+        with self._lock:
+            if address is None:
+                # Least loaded server; ties rotate so idle servers share the work
+                turn = next(self._order)
+                address = min(
+                    self.addresses,
+                    key=lambda a: (self._in_flight[a], (self.addresses.index(a) - turn) % len(self.addresses))
+                )
+            self._in_flight[address] += 1
+        try:
+            return address, self._idle[address].get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return address, Client(address, authkey=self.authkey)
+        except Exception:
+            with self._lock:
+                self._in_flight[address] -= 1
+            raise
+
+    def _checkin(self, address, connection, reuse=True):
+        with self._lock:
+            self._in_flight[address] -= 1
+        if reuse:
+            self._idle[address].put(connection)
+        else:
+            connection.close()
+
+
+def _raise_reply(kind, value):
+    if kind == "rejected":
+        message, retry_after = value
+        raise AdmissionRejected(message, retry_after)
+    raise RuntimeError(value)
+
+
+def _resolve(futures, done):
+    error = done.exception()
+    if error is not None:
+        for future in futures:
+            future.set_exception(error)
+        return
+    for future, output in zip(futures, done.result()):
+        future.set_result(output)
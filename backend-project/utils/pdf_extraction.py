@@ -0,0 +1,69 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import fitz
+import pytesseract
+from PIL import Image
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_ocr_pool = None
+_ocr_pool_lock = threading.Lock()
+
+
+def _get_ocr_pool():
+    """Worker pool shared by all extractions, created on first OCR.
+
+    pytesseract runs each page through its own tesseract process, so threads
+    are enough to keep OCR_WORKERS cores busy without re-importing the app
+    (and its model) in child processes.
+    """
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is None:
+            _ocr_pool = ThreadPoolExecutor(max_workers=Config.OCR_WORKERS, thread_name_prefix="ocr")
+        return _ocr_pool
+
+
+def ocr_page(filepath, page_index, dpi=Config.OCR_DPI):
+    """Render a single PDF page and OCR it"""
+    with fitz.open(filepath) as doc:
+        pix = doc[page_index].get_pixmap(dpi=dpi)
+        image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+    return pytesseract.image_to_string(image)
+
+
+def pdf_page_count(filepath, max_pages=Config.MAX_PDF_PAGES):
+    """Number of pages iter_pdf_pages yields for this file"""
+    with fitz.open(filepath) as doc:
+        return min(max_pages, doc.page_count)
+
+
+def iter_pdf_pages(filepath, max_pages=Config.MAX_PDF_PAGES):
+    """Yield the text of each PDF page in order, OCRing only pages without a text layer.
+
+    Pages that need OCR are rendered by the OCR workers only when they are
+    picked up, so at most OCR_WORKERS page images exist at any moment.
+    """
+    with fitz.open(filepath) as doc:
+        page_texts = [page.get_text() for page in doc.pages(0, min(max_pages, doc.page_count))]
+
+    pending = {
+        index: _get_ocr_pool().submit(ocr_page, filepath, index)
+        for index, text in enumerate(page_texts)
+        if len(text.strip()) < Config.OCR_MIN_PAGE_CHARS
+    }
+
+    try:
+        for index, text in enumerate(page_texts):
+            if index in pending:
+                try:
+                    text = pending.pop(index).result()
+                except Exception as e:
+                    logger.error(f"OCR failed for page {index + 1}: {str(e)}")
+            yield text
+    finally:
+        # The caller stopped early: drop OCR work nobody will read
+        for future in pending.values():
+            future.cancel()
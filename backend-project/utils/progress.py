@@ -0,0 +1,134 @@
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {"completed", "failed"}
+# Summary lifecycle order, for telling whether a stored state is ahead of one already sent
+STATUS_ORDER = {"uploaded": 0, "waiting_for_index": 1, "queued": 2, "processing": 3, "completed": 4, "failed": 4}
+
+
+def progress_advanced(event, last):
+    """Whether `event` is further along than `last` (e.g. a Mongo record behind the in-process broker)"""
+    def position(e):
+        return STATUS_ORDER.get(e.get("status"), 0), e.get("progress") or 0
+    return position(event) > position(last)
+
+
+class ProgressBroker:
+    """In-process pub/sub for summary job progress, keyed by doc_id.
+
+    The latest event per doc_id is kept (bounded) so new subscribers and the
+    polling endpoint can answer without touching Mongo.
+    """
+
+    def __init__(self, max_tracked=1000, subscriber_queue_size=100):
+        self._subscribers = {}
+        self._latest = OrderedDict()
+        self._max_tracked = max_tracked
+        self._queue_size = subscriber_queue_size
+        self._lock = threading.Lock()
+
+    def publish(self, doc_id, event):
+        with self._lock:
+            self._latest[doc_id] = event
+            self._latest.move_to_end(doc_id)
+            if len(self._latest) > self._max_tracked:
+                self._latest.popitem(last=False)
+            subscribers = list(self._subscribers.get(doc_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.put_nowait(event)
+            except queue.Full:
+                # A slow reader only needs the newest state; drop the oldest event
+                try:
+                    subscription.get_nowait()
+                except queue.Empty:
+                    pass
+                subscription.put_nowait(event)
+
+    def latest(self, doc_id):
+        with self._lock:
+            return self._latest.get(doc_id)
+
+    def subscribe(self, doc_id):
+        subscription = queue.Queue(maxsize=self._queue_size)
+        with self._lock:
+            self._subscribers.setdefault(doc_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, doc_id, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(doc_id)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[doc_id]
+
+
+class JobProgress:
+    """Publishes progress of one summary job with per-stage wall-clock timings.
+
+    The broker only reaches this process. `persist(event)`, if given, is
+    also called with an in-flight event at most every `persist_interval`
+    seconds, so other web workers can follow the job through Mongo.
+    """
+
+    def __init__(self, broker, doc_id, persist=None, persist_interval=2.0):
+        self.broker = broker
+        self.doc_id = doc_id
+        self.persist = persist
+        self.persist_interval = persist_interval
+        self._persisted_at = None
+        self.timings = {}
+        self.progress = 0
+        self._stage = None
+        self._stage_start = None
+        self._job_start = time.monotonic()
+
+    def stage(self, name, progress):
+        """End the current stage and start `name` at the given progress"""
+        self._end_stage()
+        self._stage = name
+        self._stage_start = time.monotonic()
+        self.update(progress)
+
+    def update(self, progress):
+        self.progress = progress
+        self._publish("processing")
+
+    def finish(self, status, **extra):
+        self._end_stage()
+        self._stage = None
+        if status == "completed":
+            self.progress = 100
+        self._publish(status, **extra)
+
+    def _end_stage(self):
+        if self._stage is not None:
+            self.timings[self._stage] = round(time.monotonic() - self._stage_start, 3)
+
+    def _publish(self, status, **extra):
+        event = {
+            "doc_id": self.doc_id,
+            "status": status,
+            "progress": self.progress,
+            "stage": self._stage,
+            "timings": dict(self.timings),
+            "elapsed": round(time.monotonic() - self._job_start, 3),
+            **extra
+        }
+        self.broker.publish(self.doc_id, event)
+        # Terminal states are written by the job itself along with its results
+        if self.persist is None or status in TERMINAL_STATUSES:
+            return
+        now = time.monotonic()
+        if self._persisted_at is None or now - self._persisted_at >= self.persist_interval:
+            self._persisted_at = now
+            try:
+                self.persist(event)
+            except Exception as e:
+                logger.warning(f"Persisting progress of {self.doc_id} failed: {str(e)}")
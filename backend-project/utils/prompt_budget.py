@@ -0,0 +1,137 @@
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Starting guess for how many characters to tokenize per wanted token; the
+# window doubles until it yields enough tokens, so this only affects speed.
+CHARS_PER_TOKEN_GUESS = 6
+
+
+class PromptBudget:
+    """Assemble prompts whose sections are filled up to an exact token budget.
+
+    Only a character window around the part of each section that can fit is
+    tokenized, and the resulting token ids are cached per (key, section), so
+    repeated prompts over the same document reuse them.
+    """
+
+    def __init__(self, tokenizer, cache_size=256):
+        self.tokenizer = tokenizer
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._template_tokens = {}
+        self._lock = threading.Lock()
+
+    def count(self, text):
+        return len(self.tokenizer(text, add_special_tokens=False, truncation=False).input_ids)
+
+    def take(self, text, max_tokens, mode="head", key=None):
+        """Return (text, kept_tokens, dropped_tokens) for at most max_tokens of text.
+
+        mode is "head" to keep the beginning, "tail" to keep the end or
+        "middle" to keep the centre. dropped_tokens is exact for the
+        tokenized window and extrapolated for text beyond it.
+        """
+        if not text or max_tokens <= 0:
+            return "", 0, self._estimate_tokens(text, 0, 0)
+
+        if mode == "middle":
+            quarter = len(text) // 4
+            text = text[quarter:len(text) - quarter] or text
+            mode = "head"
+
+        ids, window_chars = self._window_ids(text, max_tokens, mode, key)
+        kept = ids[:max_tokens] if mode == "head" else ids[-max_tokens:]
+        dropped = len(ids) - len(kept) + self._estimate_tokens(text, window_chars, len(ids))
+        return self.tokenizer.decode(kept, skip_special_tokens=True), len(kept), dropped
+
+    def build(self, template, budget, key=None, fixed=None, **sections):
+        """Fill template placeholders so the whole prompt fits in budget tokens.
+
+        `fixed` values (e.g. a filename or question) are inserted verbatim.
+        Each section is given as (text, weight, mode). The budget left after the
+        template and fixed values is split by weight; sections that need less
+        than their share hand the remainder to the others. Returns
+        (prompt, report) where report maps section name to kept/dropped tokens.
+        """
+        fixed = fixed or {}
+        cost = self._template_cost(template, list(fixed) + list(sections))
+        cost += sum(self.count(str(value)) for value in fixed.values())
+        allowances = self._allocate(sections, max(budget - cost, 0), key)
+
+        filled, report = {}, {}
+        for name, (text, _, mode) in sections.items():
+            filled[name], kept, dropped = self.take(text, allowances[name], mode, key=self._section_key(key, name))
+            report[name] = {"kept": kept, "dropped": dropped}
+
+        total_dropped = sum(entry["dropped"] for entry in report.values())
+        if total_dropped:
+            logger.info(f"Prompt budget {budget}: dropped ~{total_dropped} tokens {report}")
+        return template.format(**fixed, **filled), report
+
+    def _allocate(self, sections, available, key):
+        """Split available tokens by weight, redistributing what short sections leave over"""
+        allowances = {}
+        remaining = dict(sections)
+        while remaining:
+            total_weight = sum(weight for _, weight, _ in remaining.values()) or 1
+            share = {name: int(available * weight / total_weight) for name, (_, weight, _) in remaining.items()}
+            short = {}
+            for name, (text, _, mode) in remaining.items():
+                # Only sections that fully fit in their share can be settled early
+                _, kept, dropped = self.take(text, share[name], mode, key=self._section_key(key, name))
+                if dropped == 0 and kept < share[name]:
+                    short[name] = kept
+            if not short:
+                allowances.update(share)
+                break
+            for name, needed in short.items():
+                allowances[name] = needed
+                available -= needed
+                del remaining[name]
+        return allowances
+
+    @staticmethod
+    def _section_key(key, name):
+        return (key, name) if key is not None else None
+
+    def _template_cost(self, template, placeholders):
+        if template not in self._template_tokens:
+            # +1 for the end-of-sequence token the tokenizer appends
+            self._template_tokens[template] = self.count(template.format(**{name: "" for name in placeholders})) + 1
+        return self._template_tokens[template]
+
+    def _window_ids(self, text, max_tokens, mode, key):
+        cache_key = (key, mode) if key is not None else None
+        with self._lock:
+            cached = self._cache.get(cache_key) if cache_key else None
+            if cached:
+                self._cache.move_to_end(cache_key)
+        if cached and (len(cached[0]) >= max_tokens or cached[1] == len(text)):
+            return cached
+
+        window_chars = max_tokens * CHARS_PER_TOKEN_GUESS
+        while True:
+            window = text[:window_chars] if mode == "head" else text[-window_chars:]
+            ids = self.tokenizer(window, add_special_tokens=False, truncation=False).input_ids
+            if len(ids) >= max_tokens or len(window) == len(text):
+                break
+            window_chars *= 2
+
+        result = (ids, len(window))
+        if cache_key:
+            with self._lock:
+                self._cache[cache_key] = result
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    @staticmethod
+    def _estimate_tokens(text, window_chars, window_tokens):
+        remaining_chars = len(text or "") - window_chars
+        if remaining_chars <= 0:
+            return 0
+        ratio = window_tokens / window_chars if window_chars else 1 / CHARS_PER_TOKEN_GUESS
+        return int(remaining_chars * ratio)
@@ -0,0 +1,145 @@
+import logging
+import threading
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+CHUNK_COLLECTION_NAME = f"{Config.COLLECTION_NAME}_chunks"
+
+_embedding_fn = None
+_embedding_fn_lock = threading.Lock()
+
+
+def get_embedding_function():
+    """The EMBEDDING_MODEL embedding function, loaded once and shared by all users"""
+    global _embedding_fn
+    with _embedding_fn_lock:
+        if _embedding_fn is None:
+            from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+            _embedding_fn = SentenceTransformerEmbeddingFunction(model_name=Config.EMBEDDING_MODEL)
+        return _embedding_fn
+
+
+def get_chunk_collection(chroma_client):
+    """Get (or create) the Chroma collection holding per-chunk embeddings"""
+    return chroma_client.get_or_create_collection(
+        CHUNK_COLLECTION_NAME,
+        embedding_function=get_embedding_function()
+    )
+
+
+def chunk_text(text, chunk_size=Config.CHUNK_SIZE, overlap=Config.CHUNK_OVERLAP):
+    """Split text into overlapping chunks, preferring to break on whitespace"""
+    if not text:
+        return []
+    if overlap >= chunk_size:
+        raise ValueError("CHUNK_OVERLAP must be smaller than CHUNK_SIZE")
+
+    chunks = []
+    start = 0
+    text_length = len(text)
+    while start < text_length:
+        end = min(start + chunk_size, text_length)
+        if end < text_length:
+            # Back off to the last space so words are not cut in half
+            split_at = text.rfind(' ', start + overlap + 1, end)
+            if split_at != -1:
+                end = split_at
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= text_length:
+            break
+        start = end - overlap
+    return chunks
+
+
+def index_document(chunk_collection, doc_id, text, metadata):
+    """Chunk a document and add every chunk to the collection under its doc_id"""
+    return index_documents(chunk_collection, [(doc_id, text, metadata)])
+
+
+def index_documents(chunk_collection, documents):
+    """Chunk several (doc_id, text, metadata) documents and add all chunks in one call"""
+    ids, chunks, metadatas = [], [], []
+    for doc_id, text, metadata in documents:
+        for i, chunk in enumerate(chunk_text(text)):
+            ids.append(f"{doc_id}-{i}")
+            chunks.append(chunk)
+            metadatas.append({**metadata, "doc_id": doc_id, "chunk_index": i})
+    if chunks:
+        chunk_collection.add(ids=ids, documents=chunks, metadatas=metadatas)
+    return len(chunks)
+
+
+def index_page(chunk_collection, doc_id, text, metadata, page, first_index):
+    """Add one page's chunks, numbered on from first_index so retrieval keeps document order.
+
+    Used by incremental ingestion; chunks never span two pages. Returns the
+    number of chunks added.
+    """
+    chunks = chunk_text(text)
+    if chunks:
+        indexes = range(first_index, first_index + len(chunks))
+        chunk_collection.add(
+            ids=[f"{doc_id}-{i}" for i in indexes],
+            documents=chunks,
+            metadatas=[{**metadata, "doc_id": doc_id, "chunk_index": i, "page": page} for i in indexes]
+        )
+    return len(chunks)
+
+
+def retrieve_chunks(chunk_collection, doc_id, question, top_k=Config.TOP_K):
+    """Return the top_k chunks of a document most relevant to the question, in document order"""
+    results = chunk_collection.query(
+        query_texts=[question],
+        n_results=top_k,
+        where={"doc_id": doc_id},
+        include=["documents", "metadatas"]
+    )
+    if not results['documents'] or not results['documents'][0]:
+        return []
+
+    hits = zip(results['documents'][0], results['metadatas'][0])
+    return [doc for doc, _ in sorted(hits, key=lambda hit: hit[1].get('chunk_index', 0))]
+
+
+def search_chunks(chunk_collection, query, where, n_results):
+    """The n_results chunks matching the `where` filter that are nearest the query, best first.
+
+    score is the cosine similarity: the embeddings are unit length and Chroma
+    reports squared L2 distances.
+    """
+    results = chunk_collection.query(
+        query_texts=[query],
+        n_results=n_results,
+        where=where,
+        include=["documents", "metadatas", "distances"]
+    )
+    if not results['documents'] or not results['documents'][0]:
+        return []
+    return [
+        {
+            "doc_id": metadata["doc_id"],
+            "chunk_index": metadata.get("chunk_index", 0),
+            "page": metadata.get("page"),
+            "text": text,
+            "score": round(1 - distance / 2, 4)
+        }
+        for text, metadata, distance in zip(results['documents'][0], results['metadatas'][0], results['distances'][0])
+    ]
+
+
+def group_by_document(hits, passages_per_doc):
+    """Group best-first hits by doc_id, documents ordered by their best passage"""
+    groups = {}
+    for hit in hits:
+        group = groups.setdefault(hit['doc_id'], {"doc_id": hit['doc_id'], "score": hit['score'], "passages": []})
+        if len(group['passages']) < passages_per_doc:
+            group['passages'].append({key: hit[key] for key in ("text", "score", "page", "chunk_index")})
+    return list(groups.values())
+
+
+def delete_document_chunks(chunk_collection, **where):
+    """Delete chunks matching a metadata filter, e.g. doc_id=... or user_id=..."""
+    chunk_collection.delete(where=where)
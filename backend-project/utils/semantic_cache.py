@@ -0,0 +1,84 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+class SemanticAnswerCache:
+    """Answers reused across paraphrased questions about the same document.
+
+    For every (content_id, params) pair the embeddings of past questions are
+    kept as rows of a unit-normalized NumPy matrix, so a lookup is one
+    matrix-vector product. A stored answer is returned when the best cosine
+    similarity reaches `threshold`.
+    """
+
+    def __init__(self, embed, threshold=0.9, max_questions_per_doc=256, max_docs=1024):
+        self.embed = embed
+        self.threshold = threshold
+        self.max_questions_per_doc = max_questions_per_doc
+        self.max_docs = max_docs
+        self._docs = OrderedDict()  # (content_id, params) -> {"matrix", "questions", "answers"}
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0}
+
+    def _embed_one(self, question):
+        vector = np.asarray(self.embed([question])[0], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, content_id, question, params_key):
+        """Return (answer, similarity) for the closest past question, or None"""
+        key = (content_id, params_key)
+        with self._lock:
+            if key not in self._docs:
+                self.counters["misses"] += 1
+                return None
+        vector = self._embed_one(question)
+        with self._lock:
+            entry = self._docs.get(key)
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+            self._docs.move_to_end(key)
+            similarities = entry["matrix"] @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.counters["misses"] += 1
+                return None
+            self.counters["hits"] += 1
+            return entry["answers"][best], float(similarities[best])
+
+    def add(self, content_id, question, params_key, answer):
+        vector = self._embed_one(question)[np.newaxis, :]
+        key = (content_id, params_key)
+        with self._lock:
+            entry = self._docs.get(key)
+            if entry is None:
+                entry = self._docs[key] = {"matrix": vector, "questions": [question], "answers": [answer]}
+            else:
+                entry["matrix"] = np.vstack([entry["matrix"], vector])[-self.max_questions_per_doc:]
+                entry["questions"] = (entry["questions"] + [question])[-self.max_questions_per_doc:]
+                entry["answers"] = (entry["answers"] + [answer])[-self.max_questions_per_doc:]
+            self._docs.move_to_end(key)
+            while len(self._docs) > self.max_docs:
+                self._docs.popitem(last=False)
+
+    def invalidate(self, content_ids):
+        content_ids = set(content_ids)
+        with self._lock:
+            for key in [key for key in self._docs if key[0] in content_ids]:
+                del self._docs[key]
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+            documents = len(self._docs)
+            questions = sum(len(entry["answers"]) for entry in self._docs.values())
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            **counters,
+            "documents": documents,
+            "questions": questions,
+            "threshold": self.threshold,
+            "hit_rate": counters["hits"] / lookups if lookups else 0.0
+        }
@@ -0,0 +1,88 @@
+from concurrent.futures import as_completed
+from config import Config
+
+MAP_PROMPT = """Summarize this section of a research paper. Keep the research problem, methods, key results and numbers it mentions.
+
+Section:
+{chunk}"""
+
+REDUCE_PROMPT = """Combine these partial summaries of one research paper into a single coherent summary without repeating points.
+
+Partial summaries:
+{summaries}"""
+
+MAP_GENERATION = dict(
+    max_length=150,
+    num_beams=4,
+    no_repeat_ngram_size=3,
+    early_stopping=True
+)
+
+
+def split_by_tokens(text, tokenizer, max_tokens):
+    """Split text into consecutive pieces of at most max_tokens tokens each"""
+    ids = tokenizer(text, add_special_tokens=False, truncation=False).input_ids
+    return [
+        tokenizer.decode(ids[start:start + max_tokens], skip_special_tokens=True)
+        for start in range(0, len(ids), max_tokens)
+    ]
+
+
+def group_by_tokens(texts, tokenizer, max_tokens):
+    """Greedily pack texts into groups whose combined length fits in max_tokens"""
+    groups, current, used = [], [], 0
+    for text in texts:
+        length = len(tokenizer(text, add_special_tokens=False, truncation=False).input_ids)
+        if current and used + length > max_tokens:
+            groups.append(current)
+            current, used = [], 0
+        current.append(text)
+        used += length
+    if current:
+        groups.append(current)
+    return groups
+
+
+def _generate_all(generator, prompts, on_done=None):
+    """Run prompts through the batching generator, reporting each completion"""
+    futures = generator.submit_many(prompts, max_input_length=Config.MODEL_MAX_INPUT_TOKENS, **MAP_GENERATION)
+    index_of = {future: i for i, future in enumerate(futures)}
+    outputs = [None] * len(prompts)
+    for done, future in enumerate(as_completed(futures), start=1):
+        outputs[index_of[future]] = future.result()
+        if on_done:
+            on_done(done / len(prompts))
+    return outputs
+
+
+def map_reduce_summarize(text, tokenizer, generator, on_progress=None):
+    """Summarize a long document hierarchically and return the combined partial summaries.
+
+    Map: the text is cut into MAP_CHUNK_TOKENS pieces that are summarized as
+    one batched workload. Reduce: partial summaries are packed into groups
+    that fit REDUCE_INPUT_TOKENS and merged, repeating until one group is
+    left. The caller runs the final summary prompt over the result.
+    """
+    chunks = split_by_tokens(text, tokenizer, Config.MAP_CHUNK_TOKENS)
+    summaries = _generate_all(
+        generator,
+        [MAP_PROMPT.format(chunk=chunk) for chunk in chunks],
+        on_done=lambda fraction: on_progress and on_progress(0.8 * fraction)
+    )
+
+    groups = group_by_tokens(summaries, tokenizer, Config.REDUCE_INPUT_TOKENS)
+    while len(groups) > 1:
+        summaries = _generate_all(
+            generator,
+            [REDUCE_PROMPT.format(summaries="\n".join(group)) for group in groups]
+        )
+        merged = group_by_tokens(summaries, tokenizer, Config.REDUCE_INPUT_TOKENS)
+        if len(merged) >= len(groups):
+            # Outputs too long to pack two per group; stop instead of looping forever
+            groups = [summaries]
+            break
+        groups = merged
+
+    if on_progress:
+        on_progress(1.0)
+    return "\n".join(groups[0]) if groups else ""
@@ -0,0 +1,127 @@
+"""Text clean-up for uploads and generated output, with every pattern compiled once.
+
+Uploads go through TextCleaner, a single pass over whitespace-separated
+tokens that can be fed page by page while extraction is still running and
+reports when its character limit is reached, so callers can stop early.
+"""
+import re
+
+MAX_CLEAN_CHARS = 100000
+MAX_CARRY_CHARS = 4096  # Longer unbroken runs are not held back between chunks
+
+# Prompt text the model sometimes echoes before its answer. search() plus a
+# slice is equivalent to the old anchored r'^.*?...' patterns, minus the
+# repeated rescans from position 0.
+SUMMARY_ECHO = re.compile(r'Write.*?summary.*?:', re.DOTALL | re.IGNORECASE)
+TITLE_ECHO = re.compile(r'Document Title.*?:', re.DOTALL | re.IGNORECASE)
+LIST_ECHO = re.compile(r'List \d+.*?:', re.DOTALL | re.IGNORECASE)
+FOCUS_ECHO = re.compile(r'Focus on.*?:', re.DOTALL | re.IGNORECASE)
+
+_WHITESPACE_RUN = re.compile(r'\s+')
+_LOWER_AFTER_STOP = re.compile(r'([.!?])\s*([a-z])')
+_MISSING_STOP = re.compile(r'([a-z])([A-Z])')
+_SENTENCE_END = re.compile(r'[.!?]+')
+
+POINT_PATTERNS = [
+    re.compile(r'(\d+\.?\s*[^\n]+)'),  # 1. Point
+    re.compile(r'([•\-]\s*[^\n]+)'),   # • Point or - Point
+    re.compile(r'([^\n]+)'),           # Any line
+]
+_NUMBER_PREFIX = re.compile(r'^\d+\.?\s*')
+_BULLET_PREFIX = re.compile(r'^[•\-]\s*')
+
+_URL = re.compile(r'http\S+|www\S+')
+
+
+def _words(text):
+    if "http" in text or "www" in text:
+        text = _URL.sub(' ', text)
+    return text.split()
+
+
+class TextCleaner:
+    """Incremental upload cleaner: URLs dropped, whitespace collapsed, output capped at `limit`.
+
+    feed() accepts arbitrary chunks; a token cut off at the end of a chunk is
+    held back until the next one. It returns True once `limit` characters are
+    collected, after which further input is ignored.
+    """
+
+    def __init__(self, limit=MAX_CLEAN_CHARS):
+        self.limit = limit
+        self.full = False
+        self._words = []
+        self._length = 0
+        self._carry = ""
+
+    def feed(self, chunk):
+        if self.full:
+            return True
+        text = self._carry + chunk
+        self._carry = ""
+        if text and not text[-1].isspace():
+            parts = text.rsplit(None, 1)
+            if len(parts[-1]) <= MAX_CARRY_CHARS:
+                self._carry = parts.pop()
+                text = parts[0] if parts else ""
+        self._add(_words(text))
+        return self.full
+
+    def finish(self):
+        if self._carry and not self.full:
+            self._add(_words(self._carry))
+        self._carry = ""
+        return " ".join(self._words)[:self.limit]
+
+    def _add(self, words):
+        self._words.extend(words)
+        self._length += sum(map(len, words)) + len(words)
+        if self._length > self.limit:
+            self.full = True
+
+
+def clean_upload_text(text, limit=MAX_CLEAN_CHARS):
+    cleaner = TextCleaner(limit)
+    cleaner.feed(text)
+    return cleaner.finish()
+
+
+def strip_echo(pattern, text):
+    """Drop everything up to the end of the first match of an echoed-prompt pattern"""
+    match = pattern.search(text)
+    return text[match.end():] if match else text
+
+
+def polish_summary(text, target_length=250):
+    """Remove echoed prompt text, repair spacing and capitalization, trim to ~target_length words"""
+    text = strip_echo(SUMMARY_ECHO, text)
+    text = strip_echo(TITLE_ECHO, text)
+
+    # Fix common grammar issues
+    text = _WHITESPACE_RUN.sub(' ', text)
+    text = _LOWER_AFTER_STOP.sub(r'\1 \2', text)  # Space after punctuation
+    text = _MISSING_STOP.sub(r'\1. \2', text)  # Missing periods
+
+    sentences = [s.strip() for s in _SENTENCE_END.split(text) if s.strip()]
+    result = '. '.join(s[0].upper() + s[1:] for s in sentences)
+
+    words = result.split()
+    if len(words) > target_length:
+        result = ' '.join(words[:target_length])
+        if not result.endswith(('.', '!', '?')):
+            result += '.'
+    return result
+
+
+def split_points(text):
+    """Numbered, bulleted or plain lines of a generated list, without their markers"""
+    text = strip_echo(LIST_ECHO, text)
+    text = strip_echo(FOCUS_ECHO, text)
+
+    points = []
+    for pattern in POINT_PATTERNS:
+        matches = pattern.findall(text)
+        if len(matches) >= 2:
+            points = matches
+            break
+    return [_BULLET_PREFIX.sub('', _NUMBER_PREFIX.sub('', point).strip()).strip() for point in points]
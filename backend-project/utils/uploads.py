@@ -0,0 +1,105 @@
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+COPY_BLOCK_SIZE = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    """The upload went past its size limit while being written"""
+
+
+class SpooledUpload:
+    """An upload written to a uniquely named file in the upload folder.
+
+    Use it as a context manager: on exit the file is deleted, unless
+    UPLOAD_RETENTION_SECONDS keeps it around for sweep_uploads to remove later.
+    """
+
+    def __init__(self, path, filename, size, file_hash):
+        self.path = path
+        self.filename = filename
+        self.ext = filename.lower().rsplit('.', 1)[-1] if '.' in filename else ''
+        self.size = size
+        self.file_hash = file_hash
+        self._handed_off = False
+
+    def hand_off(self):
+        """Transfer the file to a new SpooledUpload, e.g. for a background job.
+
+        Leaving this upload's context then keeps the file; the returned
+        object deletes it on exit instead.
+        """
+        self._handed_off = True
+        return SpooledUpload(self.path, self.filename, self.size, self.file_hash)
+
+    def discard(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if not Config.UPLOAD_RETENTION_SECONDS and not self._handed_off:
+            self.discard()
+
+
+def spool_upload(stream, filename, directory, max_bytes):
+    """Copy a stream to a new file block by block, hashing and size-checking on the way.
+
+    Memory use is one block regardless of the upload size. Raises
+    UploadTooLarge (after removing the partial file) once max_bytes is passed.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    suffix = '.' + filename.rsplit('.', 1)[-1] if '.' in filename else ''
+    fd, path = tempfile.mkstemp(prefix="upload-", suffix=suffix, dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            for block in iter(lambda: stream.read(COPY_BLOCK_SIZE), b''):
+                size += len(block)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"{filename} is larger than {max_bytes} bytes")
+                digest.update(block)
+                out.write(block)
+    except BaseException:
+        os.remove(path)
+        raise
+    return SpooledUpload(path, filename, size, digest.hexdigest())
+
+
+def sweep_uploads(directory, retention_seconds=Config.UPLOAD_RETENTION_SECONDS):
+    """Delete spooled uploads older than the retention period; returns how many were removed"""
+    cutoff = time.time() - retention_seconds
+    removed = 0
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.name.startswith("upload-") or not entry.is_file():
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
+
+
+def run_upload_sweeper(directory, interval_seconds=Config.UPLOAD_SWEEP_INTERVAL):
+    """Sweep the upload folder forever; run it on a daemon thread"""
+    while True:
+        try:
+            removed = sweep_uploads(directory)
+            if removed:
+                logger.info(f"Removed {removed} expired uploads")
+        except Exception as e:
+            logger.error(f"Upload sweep failed: {str(e)}")
+        time.sleep(interval_seconds)
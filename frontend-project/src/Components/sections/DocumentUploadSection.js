@@ -30,33 +30,32 @@ export function DocumentUploadSection({
   const [progress, setProgress] = useState(0);
   const [status, setStatus] = useState('idle');
   useEffect(() => {
-    let interval;
+    let events;
     if (isSummarizing) {
-      interval = setInterval(async () => {
-        try {
-          const response = await fetch(`${API_BASE_URL}/summary-progress/${documentId}`);
-          const data = await response.json();
-          
-          if (data.status === 'completed') {
-            clearInterval(interval);
-            setProgress(100);
-            setStatus('completed');
-          } else if (data.status === 'failed') {
-            clearInterval(interval);
-            setStatus('failed');
-            // setError(data.error); - Remove since we're not using error state
-          } else {
-            setProgress(data.progress || 0);
-            setStatus(data.status);
-          }
-        } catch (error) {
-          console.error('Progress check failed:', error);
+      // Progress is pushed by the server instead of polled
+      events = new EventSource(`${API_BASE_URL}/summary-progress/${documentId}/stream`);
+      events.onmessage = (message) => {
+        const data = JSON.parse(message.data);
+        
+        if (data.status === 'completed') {
+          events.close();
+          setProgress(100);
+          setStatus('completed');
+        } else if (data.status === 'failed') {
+          events.close();
+          setStatus('failed');
+        } else {
+          setProgress(data.progress || 0);
+          setStatus(data.status);
         }
-      }, 1000);
+      };
+      events.onerror = (error) => {
+        console.error('Progress stream failed:', error);
+      };
     }
 
     return () => {
-      if (interval) clearInterval(interval);
+      if (events) events.close();
     };
   }, [isSummarizing, documentId]);
 
@@ -92,7 +92,25 @@ function Home() {
         throw new Error(errorData.error || "Failed to generate summary");
       }
       
-      const data = await response.json();
+      // The summary is generated by a background job; wait for the server to push its completion
+      await new Promise((resolve, reject) => {
+        const events = new EventSource(`${API_BASE_URL}/summary-progress/${documentId}/stream`);
+        events.onmessage = (message) => {
+          const progress = JSON.parse(message.data);
+          if (progress.status === 'completed') {
+            events.close();
+            resolve();
+          } else if (progress.status === 'failed' || progress.error) {
+            events.close();
+            reject(new Error(progress.error || "Failed to generate summary"));
+          }
+        };
+      });
+
+      const userId = localStorage.getItem('userId');
+      const detailsResponse = await fetch(`${API_BASE_URL}/document/${documentId}?user_id=${userId}`);
+      const data = await detailsResponse.json();
+      if (!detailsResponse.ok) throw new Error(data.error || "Failed to load summary");
       
       setSummary({
         text: data.summary,
@@ -124,7 +142,7 @@ function Home() {
     setInputMessage("");
 
     try {
-      const response = await fetch(`${API_BASE_URL}/ask`, {
+      const response = await fetch(`${API_BASE_URL}/ask/stream`, {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
@@ -140,13 +158,30 @@ function Home() {
         throw new Error(errorData.error || "Failed to get answer");
       }
 
-      const data = await response.json();
-      
-      const botMessage = { 
-        text: data.answer, 
-        sender: "bot" 
-      };
-      setMessages((prevMessages) => [...prevMessages, botMessage]);
+      // Show the answer as it is generated: append each streamed token to the last bot message
+      setMessages((prevMessages) => [...prevMessages, { text: "", sender: "bot" }]);
+      const appendToAnswer = (token) => setMessages((prevMessages) => {
+        const last = prevMessages[prevMessages.length - 1];
+        return [...prevMessages.slice(0, -1), { ...last, text: last.text + token }];
+      });
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split("\n\n");
+        buffer = events.pop();
+        for (const event of events) {
+          const dataLine = event.split("\n").find(line => line.startsWith("data: "));
+          if (!dataLine) continue;
+          const payload = JSON.parse(dataLine.slice(6));
+          if (event.startsWith("event: error")) throw new Error(payload.error);
+          if (payload.token) appendToAnswer(payload.token);
+        }
+      }
     } catch (error) {
       console.error("Error sending message:", error);
       const errorMessage = { 
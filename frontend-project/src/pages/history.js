@@ -17,6 +17,7 @@ function History() {
   const [selectedDoc, setSelectedDoc] = useState(null);
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
   const userId = localStorage.getItem('userId');
 
   useEffect(() => {
@@ -28,9 +29,10 @@ function History() {
     fetchDocuments();
   }, [userId, navigate]);
 
-  const fetchDocuments = async () => {
+  const fetchDocuments = async (cursor = null) => {
     try {
-      const response = await fetch(`${API_BASE_URL}/history?user_id=${userId}`, {
+      const cursorParam = cursor ? `&cursor=${encodeURIComponent(cursor)}` : '';
+      const response = await fetch(`${API_BASE_URL}/history?user_id=${userId}${cursorParam}`, {
         headers: {
           'Cache-Control': 'no-cache'
         }
@@ -41,8 +43,8 @@ function History() {
       }
 
       const data = await response.json();
-      console.log('Fetched documents:', data); // Debug log
-      setDocuments(data);
+      setDocuments(prevDocuments => cursor ? [...prevDocuments, ...data.items] : data.items);
+      setNextCursor(data.next_cursor);
     } catch (error) {
       console.error('History fetch error:', error);
       setError(error.message);
@@ -128,7 +130,7 @@ function History() {
             <div className="text-center py-10">
               <p className="text-red-600 mb-2">{error}</p>
               <button
-                onClick={fetchDocuments}
+                onClick={() => fetchDocuments()}
                 className="text-indigo-600 hover:text-indigo-800"
               >
                 Try Again
@@ -187,6 +189,16 @@ function History() {
                   ))}
                 </tbody>
               </table>
+              {nextCursor && (
+                <div className="px-6 py-4 text-center">
+                  <button
+                    onClick={() => fetchDocuments(nextCursor)}
+                    className="text-indigo-600 hover:text-indigo-800 text-sm"
+                  >
+                    Load more
+                  </button>
+                </div>
+              )}
             </div>
           )}
         </div>